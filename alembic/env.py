@@ -18,7 +18,7 @@ from src.core.database import Base
 # 2. Import ONLY the models we have created so far
 from src.modules.auth.models import * 
 from src.modules.availability.models import AvailabilitySlot
-from src.modules.bookings.models import Booking,IdempotencyKey
+from src.modules.bookings.models import Booking,BookingSlot,IdempotencyKey
 from src.modules.payment.models import Payment
 from src.modules.consultations.models import Prescription
 config = context.config
@@ -0,0 +1,35 @@
+"""idempotency_keys: in-flight leases and TTL
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 09:10:00.000000
+
+Columns used by the database idempotency store (IDEMPOTENCY_BACKEND=database):
+lock_token / locked_until for the lease, expires_at for the TTL sweeper.
+Existing rows get the usual 24h lifetime from created_at, otherwise a NULL
+expires_at would block their key forever.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001a'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('idempotency_keys', sa.Column('lock_token', sa.String(), nullable=True))
+    op.add_column('idempotency_keys', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('idempotency_keys', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE idempotency_keys SET expires_at = created_at + interval '24 hours' WHERE expires_at IS NULL")
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_column('idempotency_keys', 'expires_at')
+    op.drop_column('idempotency_keys', 'locked_until')
+    op.drop_column('idempotency_keys', 'lock_token')
@@ -0,0 +1,39 @@
+"""refresh_tokens: SHA-256 digests, families and lookup indexes
+
+Revision ID: 0001b
+Revises: 0001a
+Create Date: 2026-10-18 09:20:00.000000
+
+token_hash becomes a 64-char digest behind a unique index, and family_id
+groups the tokens of one login. Existing rows hold raw tokens that can never
+match a digest (and have no family), so they are deleted: those sessions
+log in again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001b'
+down_revision = '0001a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM refresh_tokens")
+    op.alter_column('refresh_tokens', 'token_hash', type_=sa.String(length=64), existing_nullable=False)
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.UUID(), nullable=False))
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_token_hash'), 'refresh_tokens', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_refresh_tokens_user_id'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_token_hash'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_family_id'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'family_id')
+    op.alter_column('refresh_tokens', 'token_hash', type_=sa.String(), existing_nullable=False)
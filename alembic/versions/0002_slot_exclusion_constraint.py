@@ -0,0 +1,43 @@
+"""slot non-overlap exclusion constraint
+
+Revision ID: 0002
+Revises: 0001b
+Create Date: 2026-10-18 09:30:00.000000
+
+Stores each slot as a tstzrange and lets a GiST EXCLUDE constraint reject
+overlapping slots of the same doctor. Fails if overlapping slots already
+exist: clean those up first.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # '=' on uuid inside a GiST index needs btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('availability_slots', sa.Column(
+        'during',
+        postgresql.TSTZRANGE(),
+        sa.Computed("tstzrange(start_time, end_time, '[)')", persisted=True),
+        nullable=True
+    ))
+    op.create_exclude_constraint(
+        'ex_availability_slots_no_overlap',
+        'availability_slots',
+        ('doctor_id', '='),
+        ('during', '&&'),
+        using='gist'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_availability_slots_no_overlap', 'availability_slots', type_='exclude')
+    op.drop_column('availability_slots', 'during')
@@ -0,0 +1,40 @@
+"""partial index for open-slot search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+(start_time, id) over open slots only, for keyset pagination in
+GET /availability/open. Built CONCURRENTLY so slot writes are not blocked.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_availability_slots_open_start_id',
+            'availability_slots',
+            ['start_time', 'id'],
+            unique=False,
+            postgresql_where=sa.text('is_booked = false'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_availability_slots_open_start_id',
+            table_name='availability_slots',
+            postgresql_concurrently=True,
+        )
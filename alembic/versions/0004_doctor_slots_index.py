@@ -0,0 +1,38 @@
+"""composite index for a doctor's windowed slot listing
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:00:00.000000
+
+(doctor_id, start_time, id) serves GET /availability/slots (window + keyset)
+and the NDJSON export in index order, without a sort.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_availability_slots_doctor_start_id',
+            'availability_slots',
+            ['doctor_id', 'start_time', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_availability_slots_doctor_start_id',
+            table_name='availability_slots',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,42 @@
+"""covering indexes for booking history
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:00:00.000000
+
+(patient_id | doctor_id, created_at, id) INCLUDE (status, slot_id) serve
+GET /bookings/ newest first with keyset pagination.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_bookings_patient_created_id': 'patient_id',
+    'ix_bookings_doctor_created_id': 'doctor_id',
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, owner in INDEXES.items():
+            op.create_index(
+                name,
+                'bookings',
+                [owner, 'created_at', 'id'],
+                unique=False,
+                postgresql_include=['status', 'slot_id'],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='bookings', postgresql_concurrently=True)
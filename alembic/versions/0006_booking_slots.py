@@ -0,0 +1,36 @@
+"""booking_slots: multi-slot bookings
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:00:00.000000
+
+Every slot of a multi-slot booking (POST /bookings/multi). Booking.slot_id
+stays the first slot; single-slot bookings have no rows here.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'booking_slots',
+        sa.Column('booking_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('slot_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['slot_id'], ['availability_slots.id']),
+        sa.PrimaryKeyConstraint('booking_id', 'slot_id'),
+    )
+    op.create_index(op.f('ix_booking_slots_slot_id'), 'booking_slots', ['slot_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_booking_slots_slot_id'), table_name='booking_slots')
+    op.drop_table('booking_slots')
@@ -0,0 +1,40 @@
+"""partial index for the stale booking janitor
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:00:00.000000
+
+(created_at) WHERE status = 'PENDING': the janitor finds its oldest-first
+chunks without scanning confirmed / cancelled history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_bookings_pending_created_at',
+            'bookings',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_bookings_pending_created_at',
+            table_name='bookings',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,26 @@
+"""refresh_tokens.revoked_reason: only replayed rotated tokens count as theft
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:00:00.000000
+
+'rotated' | 'logout' | 'reuse'. Rows revoked before this revision stay NULL:
+replaying them is rejected without revoking the family.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('revoked_reason', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('refresh_tokens', 'revoked_reason')
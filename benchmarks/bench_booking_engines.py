@@ -0,0 +1,137 @@
+"""
+Booking engines under contention: "pessimistic" (SELECT ... FOR UPDATE, then
+UPDATE + 2 INSERTs + COMMIT) vs "optimistic" (one conditional UPDATE CTE + COMMIT).
+
+Concurrent clients race for a small pool of slots (picked at random, so many
+requests collide on the same slot) until every slot is booked. Reports
+successful bookings/sec and latency percentiles of all attempts (409s included).
+
+Needs a real, migrated database (DATABASE_URL). Creates its own doctor,
+patient and slots and deletes them afterwards.
+
+Usage (from the project root):
+    python benchmarks/bench_booking_engines.py
+    python benchmarks/bench_booking_engines.py --slots 500 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Setup Path
+sys.path.append(os.getcwd())
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.common.config import settings
+from src.modules.auth.models import AuditLog, User, UserRole
+from src.modules.availability.models import AvailabilitySlot
+from src.modules.bookings.models import Booking
+from src.modules.bookings.repository import BookingRepository
+from src.modules.bookings.service import BOOKING_ENGINES, BookingService
+
+async def seed(sessions, slot_count: int):
+    doctor_id, patient_id = uuid.uuid4(), uuid.uuid4()
+    start = datetime.now(timezone.utc) + timedelta(days=365)
+    async with sessions() as db:
+        await db.execute(insert(User), [
+            {"id": doctor_id, "email": f"bench-{doctor_id}@example.com", "password_hash": "-", "role": UserRole.DOCTOR},
+            {"id": patient_id, "email": f"bench-{patient_id}@example.com", "password_hash": "-", "role": UserRole.PATIENT},
+        ])
+        slots = [
+            {"id": uuid.uuid4(), "doctor_id": doctor_id, "is_booked": False, "status": "OPEN",
+             "start_time": start + timedelta(minutes=15 * i), "end_time": start + timedelta(minutes=15 * (i + 1))}
+            for i in range(slot_count)
+        ]
+        await db.execute(insert(AvailabilitySlot), slots)
+        await db.commit()
+    return doctor_id, patient_id, [slot["id"] for slot in slots]
+
+async def reset(sessions, doctor_id, patient_id):
+    """Frees every slot again so each engine starts from the same state."""
+    async with sessions() as db:
+        await db.execute(delete(AuditLog).where(AuditLog.performed_by == patient_id))
+        await db.execute(delete(Booking).where(Booking.patient_id == patient_id))
+        await db.execute(
+            update(AvailabilitySlot).where(AvailabilitySlot.doctor_id == doctor_id).values(is_booked=False, status="OPEN")
+        )
+        await db.commit()
+
+async def cleanup(sessions, doctor_id, patient_id):
+    await reset(sessions, doctor_id, patient_id)
+    async with sessions() as db:
+        await db.execute(delete(AvailabilitySlot).where(AvailabilitySlot.doctor_id == doctor_id))
+        await db.execute(delete(User).where(User.id.in_([doctor_id, patient_id])))
+        await db.commit()
+
+async def run(sessions, engine_name: str, patient_id, slot_ids: list, concurrency: int):
+    remaining = set(slot_ids)
+    latencies, conflicts = [], 0
+
+    async def client():
+        nonlocal conflicts
+        while remaining:
+            slot_id = random.choice(tuple(remaining))
+            started = time.perf_counter()
+            async with sessions() as db:
+                service = BookingService(BookingRepository(db), engine=engine_name)
+                try:
+                    await service.book_slot(str(uuid.uuid4()), patient_id, slot_id)
+                    remaining.discard(slot_id)
+                except HTTPException as e:
+                    if e.status_code != 409:
+                        raise
+                    conflicts += 1
+                    remaining.discard(slot_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "engine": engine_name,
+        "booked_per_s": len(slot_ids) / elapsed,
+        "conflicts": conflicts,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+async def main(slot_count: int, concurrency: int, rounds: int):
+    # Dedicated pool, sized so clients wait on the database, not on the pool
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=concurrency, max_overflow=0)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+    doctor_id, patient_id, slot_ids = await seed(sessions, slot_count)
+    try:
+        results = []
+        for _ in range(rounds):
+            for engine_name in BOOKING_ENGINES:
+                await reset(sessions, doctor_id, patient_id)
+                results.append(await run(sessions, engine_name, patient_id, slot_ids, concurrency))
+    finally:
+        await cleanup(sessions, doctor_id, patient_id)
+        await engine.dispose()
+
+    print(f"{slot_count} slots, {concurrency} concurrent clients, {rounds} round(s)")
+    print(f"{'engine':<14}{'booked/s':>10}{'409s':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['engine']:<14}{r['booked_per_s']:>10.0f}{r['conflicts']:>8}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3, help="Alternate engines this many times")
+    args = parser.parse_args()
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.slots, args.concurrency, args.rounds))
@@ -0,0 +1,83 @@
+"""
+Cache codec benchmark: encode/decode cost and bytes per key.
+
+Usage (from the project root):
+    python benchmarks/bench_cache_codecs.py
+    python benchmarks/bench_cache_codecs.py --redis-url redis://localhost:6379/0
+
+With --redis-url the payloads are also written to Redis and the real
+per-key footprint is read back with MEMORY USAGE.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import timeit
+import uuid
+
+# Setup Path
+sys.path.append(os.getcwd())
+
+from src.common.codecs import PayloadCodec, SERIALIZER_TAGS, COMPRESSOR_TAGS
+
+def doctor_search_page(size: int = 50):
+    """Same shape as DoctorService.search_doctors (wrapped in the get_or_set envelope)."""
+    data = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Dr. Example Person {i}",
+            "specialization": "Cardiology" if i % 2 else "General Physician",
+            "experience": i % 30,
+            "consultation_fee": 499.0 + i,
+        }
+        for i in range(size)
+    ]
+    return {
+        "value": {"data": data, "meta": {"page": 1, "limit": size, "count": size}},
+        "fresh_until": 1760000000.0,
+    }
+
+def idempotency_record():
+    """Same shape as IdempotencyMiddleware's cached response."""
+    body = '{"id":"%s","status":"PENDING","slot_id":"%s","patient_id":"%s","created_at":"2025-01-01T10:00:00+00:00"}' % (
+        uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    )
+    return {"status_code": 200, "body": body, "media_type": "application/json"}
+
+def codecs_under_test():
+    for serializer in SERIALIZER_TAGS:
+        for compression in COMPRESSOR_TAGS:
+            yield PayloadCodec(serializer, compression=compression, compress_min_bytes=0)
+
+async def redis_memory_usage(redis_url: str, payload: bytes) -> int:
+    import redis.asyncio as redis
+    client = redis.from_url(redis_url)
+    key = f"bench:codec:{uuid.uuid4()}"
+    try:
+        await client.set(key, payload, ex=60)
+        return await client.memory_usage(key)
+    finally:
+        await client.delete(key)
+        await client.aclose()
+
+def run(redis_url: str = None, number: int = 2000):
+    for label, obj in [("doctor search page (50 rows)", doctor_search_page()), ("idempotency record", idempotency_record())]:
+        print(f"\n=== {label} ===")
+        print(f"{'codec':<20}{'bytes':>8}{'redis mem':>11}{'encode us':>11}{'decode us':>11}")
+        for codec in codecs_under_test():
+            payload = codec.encode(obj)
+            assert PayloadCodec.decode(payload) == obj
+
+            encode_us = timeit.timeit(lambda: codec.encode(obj), number=number) / number * 1e6
+            decode_us = timeit.timeit(lambda: PayloadCodec.decode(payload), number=number) / number * 1e6
+            memory = asyncio.run(redis_memory_usage(redis_url, payload)) if redis_url else "-"
+
+            name = f"{codec.serializer}+{codec.compression or 'none'}"
+            print(f"{name:<20}{len(payload):>8}{memory:>11}{encode_us:>11.1f}{decode_us:>11.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default=None, help="Also measure MEMORY USAGE per key in this Redis")
+    parser.add_argument("--number", type=int, default=2000, help="Iterations per measurement")
+    args = parser.parse_args()
+    run(args.redis_url, args.number)
@@ -0,0 +1,67 @@
+"""
+Cost of verifying an access token: full jwt.decode (HMAC + JSON + claim checks)
+vs a hit in the verified-token cache (SHA-256 digest + dict lookup).
+
+Usage (from the project root):
+    SECRET_KEY=... DATABASE_URL=... python benchmarks/bench_jwt_cache.py
+    python benchmarks/bench_jwt_cache.py --iterations 200000 --tokens 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+# Setup Path
+sys.path.append(os.getcwd())
+
+from jose import jwt
+
+from src.common.config import settings
+from src.common.jwt_cache import VerifiedTokenCache
+from src.common.utils import create_access_token
+
+def per_call_us(fn, tokens, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(random.choice(tokens))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main(iterations: int, token_count: int):
+    tokens = [
+        create_access_token(data={"sub": str(uuid.uuid4()), "role": "patient", "ver": 0})
+        for _ in range(token_count)
+    ]
+    cache = VerifiedTokenCache(max_items=token_count)
+
+    def decode(token):
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    def cached(token):
+        claims = cache.get(token)
+        if claims is None:
+            claims = decode(token)
+            cache.set(token, claims)
+        return claims
+
+    for token in tokens: # Warm up the cache
+        cached(token)
+
+    baseline = per_call_us(lambda _: None, tokens, iterations)
+    results = [
+        ("jwt.decode", per_call_us(decode, tokens, iterations) - baseline),
+        ("cache hit", per_call_us(cached, tokens, iterations) - baseline),
+    ]
+
+    print(f"{token_count} distinct tokens, {iterations} lookups")
+    print(f"{'variant':<15}{'us/call':>10}{'speedup':>10}")
+    for name, cost in results:
+        print(f"{name:<15}{cost:>10.2f}{results[0][1] / cost:>9.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=500, help="Distinct tokens (e.g. concurrent sessions)")
+    args = parser.parse_args()
+    main(args.iterations, args.tokens)
@@ -0,0 +1,103 @@
+"""
+Per-request overhead of RequestIDMiddleware: BaseHTTPMiddleware + synchronous
+stdout logging (before) vs raw ASGI + contextvar + QueueHandler (after).
+
+Usage (from the project root):
+    python benchmarks/bench_middleware_overhead.py
+    python benchmarks/bench_middleware_overhead.py --requests 20000
+
+Requests go through httpx's in-process ASGI transport, so the numbers are the
+framework + middleware cost only (no sockets). Log output is discarded.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Setup Path
+sys.path.append(os.getcwd())
+
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from pythonjsonlogger import jsonlogger
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import src.core.logger as app_logger
+from src.core.middleware import RequestIDMiddleware
+
+# --- BEFORE: the original middleware, logging synchronously ---
+legacy_logger = logging.getLogger("bench.legacy_middleware")
+legacy_handler = logging.StreamHandler(open(os.devnull, "w"))
+legacy_handler.setFormatter(jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s"))
+legacy_logger.addHandler(legacy_handler)
+legacy_logger.setLevel(logging.INFO)
+legacy_logger.propagate = False
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        response = await call_next(request)
+        log_data = {
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration": round(time.time() - start_time, 4),
+            "request_id": request_id
+        }
+        legacy_logger.info("Request Completed", extra=log_data)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+async def measure(app: FastAPI, requests: int):
+    latencies = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(200): # Warm up
+            await client.get("/ping")
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "mean": statistics.fmean(latencies) * 1e6,
+        "p50": latencies[len(latencies) // 2] * 1e6,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+async def main(requests: int):
+    # Send the new (queued) log output to /dev/null as well
+    app_logger._get_listener().handlers[0].setStream(open(os.devnull, "w"))
+
+    baseline = await measure(build_app(), requests)
+    results = [
+        ("no middleware", baseline),
+        ("before (BaseHTTPMiddleware)", await measure(build_app(LegacyRequestIDMiddleware), requests)),
+        ("after (raw ASGI + queue)", await measure(build_app(RequestIDMiddleware), requests)),
+    ]
+
+    print(f"{'variant':<30}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead us':>13}")
+    for name, stats in results:
+        overhead = stats["mean"] - baseline["mean"]
+        print(f"{name:<30}{stats['mean']:>10.1f}{stats['p50']:>10.1f}{stats['p99']:>10.1f}{overhead:>13.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
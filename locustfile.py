@@ -1,5 +1,6 @@
+import random
 import uuid
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, constant
 
 class TelemedicineUser(HttpUser):
     wait_time = between(1, 3) 
@@ -34,4 +35,37 @@ class TelemedicineUser(HttpUser):
             }, headers={
                 "Authorization": f"Bearer {self.token}",
                 "Idempotency-Key": f"load-book-{uuid.uuid4()}"
-            })
\ No newline at end of file
+            })
+
+class LoginBurstUser(HttpUser):
+    """
+    LOGIN STORM: hammers bcrypt (login = verify, register = hash).
+    Run together with TelemedicineUser and watch /doctors latency stay flat:
+        locust -f locustfile.py TelemedicineUser LoginBurstUser
+    503s are expected backpressure from the bcrypt pool, not failures.
+    """
+    wait_time = constant(0)
+    weight = 1
+
+    def _client_ip(self):
+        # Spread the burst over many "clients" so the per-IP login rate limit
+        # doesn't absorb it before it reaches bcrypt.
+        return {"X-Forwarded-For": f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"}
+
+    def _post(self, path, payload):
+        with self.client.post(path, json=payload, headers=self._client_ip(), catch_response=True) as response:
+            if response.status_code == 503:
+                response.success()
+
+    @task(3)
+    def login(self):
+        self._post("/auth/login", {"email": "patient@gmail.com", "password": "password123"})
+
+    @task(1)
+    def register(self):
+        self._post("/auth/register", {
+            "email": f"burst-{uuid.uuid4()}@example.com",
+            "password": "password123",
+            "full_name": "Load Test",
+            "role": "patient"
+        })
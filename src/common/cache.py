@@ -1,33 +1,305 @@
 import redis.asyncio as redis
-import json
+import asyncio
 import os
+import time
+from collections import OrderedDict
+from src.common.config import settings
+from src.common.codecs import PayloadCodec, DEFAULT_CODEC
+from src.core.logger import setup_logger
+from src.core.metrics import CACHE_REQUESTS
+
+logger = setup_logger("cache")
 
 # Connect to the Redis Container (hostname: amrutam_redis)
 REDIS_URL = os.getenv("REDIS_URL", "redis://amrutam_redis:6379/0")
 
+# Workers publish the invalidated namespace ('<namespace>') or single entry
+# ('<namespace>:<key>') here so every local tier drops it.
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Only one worker refreshes a soft-expired key; the lock self-heals after this many seconds.
+REFRESH_LOCK_TTL = 10
+
+# Every namespace has a "generation" counter. Real keys look like
+# '<namespace>:v<generation>:<key>', so bumping the counter makes every old key
+# unreachable at once (they age out through their TTL) instead of scanning
+# the keyspace with KEYS.
+# NOTE: The scripts build the data key from ARGV, which is fine for a single
+# Redis node but not for Redis Cluster.
+_GET_SCRIPT = """
+local gen = redis.call('GET', KEYS[1]) or '0'
+return redis.call('GET', ARGV[1] .. ':v' .. gen .. ':' .. ARGV[2])
+"""
+
+# ARGV[5] (optional): the generation the value was computed under. If the
+# namespace was invalidated since, the value is stale and is NOT stored.
+_SET_SCRIPT = """
+local gen = redis.call('GET', KEYS[1]) or '0'
+if ARGV[5] and ARGV[5] ~= gen then return false end
+redis.call('SET', ARGV[1] .. ':v' .. gen .. ':' .. ARGV[2], ARGV[3], 'EX', ARGV[4])
+return gen
+"""
+
+_DELETE_SCRIPT = """
+local gen = redis.call('GET', KEYS[1]) or '0'
+return redis.call('DEL', ARGV[1] .. ':v' .. gen .. ':' .. ARGV[2])
+"""
+
+class LocalCache:
+    """
+    Per-worker, bounded LRU with per-entry TTL.
+    Values are stored already decoded, so a hit costs no network I/O and no decoding.
+    Callers must treat returned objects as read-only.
+    """
+    def __init__(self, max_items: int, ttl: int):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries = OrderedDict() # (namespace, key) -> (expires_at, value)
+        # Bumped on every invalidation; lets us drop fills that raced with one
+        self._epochs = {}
+
+    def epoch(self, namespace: str) -> int:
+        return self._epochs.get(namespace, 0)
+
+    def get(self, namespace: str, key: str):
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return value
+
+    def set(self, namespace: str, key: str, value, ttl: int):
+        expires_at = time.monotonic() + min(ttl, self.ttl)
+        self._entries[(namespace, key)] = (expires_at, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str):
+        # Bump the epoch too, so an in-flight fill of this key is dropped
+        self._epochs[namespace] = self.epoch(namespace) + 1
+        self._entries.pop((namespace, key), None)
+
+    def invalidate_namespace(self, namespace: str):
+        self._epochs[namespace] = self.epoch(namespace) + 1
+        for entry_key in [k for k in self._entries if k[0] == namespace]:
+            del self._entries[entry_key]
+
+    def clear(self):
+        for namespace in {k[0] for k in self._entries}:
+            self._epochs[namespace] = self.epoch(namespace) + 1
+        self._entries.clear()
+
 class CacheService:
     def __init__(self):
+        # Text client: rate limiter, pub/sub, locks and counters
         self.redis = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+        # Binary client: cached payloads are framed bytes (see src/common/codecs.py)
+        self.binary = redis.from_url(REDIS_URL, decode_responses=False)
         # CONFIG: How long (in seconds) to keep search results?
         # 60 seconds is a good balance: Data isn't too stale, but DB is protected.
-        self.TTL = 60 
+        self.TTL = 60
+
+        # Lua scripts resolve the generation + data key in ONE round trip
+        self._get_script = self.binary.register_script(_GET_SCRIPT)
+        self._set_script = self.binary.register_script(_SET_SCRIPT)
+        self._delete_script = self.binary.register_script(_DELETE_SCRIPT)
+
+        # Optional in-process tier (only for namespaces registered with local=True)
+        self.local = None
+        if settings.CACHE_LOCAL_ENABLED:
+            self.local = LocalCache(settings.CACHE_LOCAL_MAX_ITEMS, settings.CACHE_LOCAL_TTL)
+        self._local_namespaces = set()
+        self._codecs = {}
+        self._listener_task = None
+
+        # Single-flight: (namespace, key) -> running computation in this worker
+        self._inflight = {}
+        # Stale-while-revalidate refreshes running in this worker (kept referenced until done)
+        self._refreshing = {}
+
+    def register_namespace(self, namespace: str, local: bool = False, codec: PayloadCodec = None):
+        """Declare how a namespace is cached. Call once at import time."""
+        if local:
+            self._local_namespaces.add(namespace)
+        if codec is not None:
+            self._codecs[namespace] = codec
 
-    async def get_cached_data(self, key: str):
-        """Try to fetch data from RAM."""
-        data = await self.redis.get(key)
-        if data:
-            return json.loads(data)
+    def _local_for(self, namespace: str):
+        if self.local is not None and namespace in self._local_namespaces:
+            return self.local
         return None
 
-    async def set_cached_data(self, key: str, data: dict):
-        """Save data to RAM with an expiration timer."""
-        await self.redis.setex(key, self.TTL, json.dumps(data))
+    @staticmethod
+    def _generation_key(namespace: str) -> str:
+        return f"cache:gen:{namespace}"
+
+    async def get_cached_data(self, namespace: str, key: str):
+        """Try to fetch data from process memory first, then from Redis."""
+        local = self._local_for(namespace)
+        if local is not None:
+            value = local.get(namespace, key)
+            if value is not None:
+                CACHE_REQUESTS.labels("local", namespace, "hit").inc()
+                return value
+            CACHE_REQUESTS.labels("local", namespace, "miss").inc()
+            epoch = local.epoch(namespace)
+
+        data = await self._get_script(keys=[self._generation_key(namespace)], args=[namespace, key])
+        if not data:
+            CACHE_REQUESTS.labels("redis", namespace, "miss").inc()
+            return None
+
+        try:
+            value = PayloadCodec.decode(data)
+        except Exception as e:
+            # e.g. written by a worker with a compressor we don't have: treat as a miss
+            logger.warning(f"⚠️ Undecodable cache payload for {namespace}:{key}: {e}")
+            CACHE_REQUESTS.labels("redis", namespace, "miss").inc()
+            return None
+
+        CACHE_REQUESTS.labels("redis", namespace, "hit").inc()
+        # Skip the fill if an invalidation arrived while we were talking to Redis
+        if local is not None and local.epoch(namespace) == epoch:
+            local.set(namespace, key, value, self.TTL)
+        return value
+
+    async def get_generation(self, namespace: str) -> str:
+        return await self.redis.get(self._generation_key(namespace)) or "0"
+
+    async def set_cached_data(self, namespace: str, key: str, data: dict, ttl: int = None, generation: str = None):
+        """
+        Save data to RAM with an expiration timer (one command, TTL included).
+        Pass the `generation` read before computing `data` to drop the write
+        if the namespace was invalidated meanwhile. Returns False if dropped.
+        """
+        ttl = ttl or self.TTL
+        args = [namespace, key, self._codecs.get(namespace, DEFAULT_CODEC).encode(data), ttl]
+        if generation is not None:
+            args.append(generation)
+        stored = await self._set_script(keys=[self._generation_key(namespace)], args=args)
+        if stored is None:
+            return False
+        local = self._local_for(namespace)
+        if local is not None:
+            local.set(namespace, key, data, ttl)
+        return True
+
+    async def get_or_set(self, namespace: str, key: str, compute, ttl: int = None, stale_ttl: int = 0):
+        """
+        Read-through cache with request coalescing.
+        - Miss: only ONE call to `compute()` runs per key in this worker; concurrent
+          callers await the same result instead of hitting the DB.
+        - Soft-TTL (stale_ttl > 0): after `ttl` the entry is still served for
+          `stale_ttl` seconds while a single background refresh recomputes it.
+        `compute` must not depend on the caller's request (e.g. its DB session),
+        because it can outlive the request that started it.
+        """
+        ttl = ttl or self.TTL
+        envelope = await self.get_cached_data(namespace, key)
+        if envelope is not None:
+            if envelope["fresh_until"] < time.time():
+                self._refresh_in_background(namespace, key, compute, ttl, stale_ttl)
+            return envelope["value"]
+
+        return await self._single_flight(namespace, key, compute, ttl, stale_ttl)
+
+    def _single_flight(self, namespace: str, key: str, compute, ttl: int, stale_ttl: int):
+        task = self._inflight.get((namespace, key))
+        if task is None:
+            task = asyncio.create_task(self._compute_and_store(namespace, key, compute, ttl, stale_ttl))
+            self._inflight[(namespace, key)] = task
+            task.add_done_callback(lambda _: self._inflight.pop((namespace, key), None))
+        # shield(): a cancelled caller must not cancel the computation others are waiting on
+        return asyncio.shield(task)
+
+    async def _compute_and_store(self, namespace: str, key: str, compute, ttl: int, stale_ttl: int):
+        # Read BEFORE computing: an invalidation during compute() must win
+        generation = await self.get_generation(namespace)
+        value = await compute()
+        envelope = {"value": value, "fresh_until": time.time() + ttl}
+        await self.set_cached_data(namespace, key, envelope, ttl=ttl + stale_ttl, generation=generation)
+        return value
+
+    def _refresh_in_background(self, namespace: str, key: str, compute, ttl: int, stale_ttl: int):
+        if (namespace, key) in self._refreshing:
+            return
+
+        async def refresh():
+            # Cross-worker guard: only the worker that wins the lock recomputes
+            lock_key = f"cache:refresh:{namespace}:{key}"
+            if not await self.redis.set(lock_key, "1", nx=True, ex=REFRESH_LOCK_TTL):
+                return
+            try:
+                await self._compute_and_store(namespace, key, compute, ttl, stale_ttl)
+            except Exception as e:
+                logger.warning(f"⚠️ Background refresh failed for {namespace}:{key}: {e}")
+            finally:
+                await self.redis.delete(lock_key)
+
+        task = asyncio.create_task(refresh())
+        self._refreshing[(namespace, key)] = task
+        task.add_done_callback(lambda _: self._refreshing.pop((namespace, key), None))
+
+    async def delete(self, namespace: str, key: str):
+        """Invalidate ONE key (e.g. a single user's principal) in Redis and every local tier."""
+        await self._delete_script(keys=[self._generation_key(namespace)], args=[namespace, key])
+        if self.local is not None:
+            self.local.delete(namespace, key)
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{namespace}:{key}")
+
+    async def invalidate_namespace(self, namespace: str):
+        """
+        Invalidate every key in a namespace (e.g., 'doctors') in O(1).
+        We only bump the generation; stale keys expire on their own TTL.
+        Other workers drop their local copies via pub/sub.
+        """
+        await self.redis.incr(self._generation_key(namespace))
+        if self.local is not None:
+            self.local.invalidate_namespace(namespace)
+            await self.redis.publish(INVALIDATION_CHANNEL, namespace)
+
+    # --- PUB/SUB COHERENCE (Local tier only) ---
+    async def start(self):
+        """Start the invalidation listener (called from the app lifespan)."""
+        if self.local is not None and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
 
-    async def invalidate_pattern(self, pattern: str):
-        """Delete all keys matching a pattern (e.g., 'doctors:*')."""
-        keys = await self.redis.keys(pattern)
-        if keys:
-            await self.redis.delete(*keys)
+    async def _listen_for_invalidations(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # We may have missed messages while (re)connecting
+                self.local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        namespace, _, key = message["data"].partition(":")
+                        if key:
+                            self.local.delete(namespace, key)
+                        else:
+                            self.local.invalidate_namespace(namespace)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Cache invalidation listener lost connection: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
 
 # Global Instance
-cache = CacheService()
\ No newline at end of file
+cache = CacheService()
@@ -0,0 +1,98 @@
+import json
+import zlib
+
+# Optional fast paths. Each one falls back to the stdlib if the package is missing.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# --- PAYLOAD FORMAT ---
+# Every cached value is framed as: <serializer tag><compression tag><body>
+# The tags make payloads self-describing, so changing a namespace's codec
+# never breaks keys that were written with the previous one.
+# Tags are control bytes, so they can never be confused with legacy
+# plain-JSON values (which start with '{', '[' or '"').
+
+# 1. Serializers: tag -> (encode, decode)
+def _json_encode(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def _json_decode(data: bytes):
+    return json.loads(data)
+
+SERIALIZERS = {b"\x01": (_json_encode, _json_decode)}
+SERIALIZER_TAGS = {"json": b"\x01"}
+
+if orjson is not None:
+    SERIALIZERS[b"\x02"] = (orjson.dumps, orjson.loads)
+    SERIALIZER_TAGS["orjson"] = b"\x02"
+
+if msgpack is not None:
+    SERIALIZERS[b"\x03"] = (
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    )
+    SERIALIZER_TAGS["msgpack"] = b"\x03"
+
+# 2. Compressors: tag -> (compress, decompress)
+COMPRESSORS = {
+    b"\x00": (lambda data: data, lambda data: data),
+    b"\x01": (lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+COMPRESSOR_TAGS = {None: b"\x00", "zlib": b"\x01"}
+
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    COMPRESSORS[b"\x02"] = (_zstd_compressor.compress, _zstd_decompressor.decompress)
+    COMPRESSOR_TAGS["zstd"] = b"\x02"
+
+class PayloadCodec:
+    """
+    Encodes Python objects into framed bytes for Redis.
+    Unknown/unavailable serializers fall back to 'orjson' then 'json',
+    and unavailable compressors fall back to 'zlib'.
+    """
+    def __init__(self, serializer: str = "json", compression: str = None, compress_min_bytes: int = 1024):
+        if serializer not in SERIALIZER_TAGS:
+            serializer = "orjson" if "orjson" in SERIALIZER_TAGS else "json"
+        if compression not in COMPRESSOR_TAGS:
+            compression = "zlib"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self._serializer_tag = SERIALIZER_TAGS[serializer]
+        self._compressor_tag = COMPRESSOR_TAGS[compression]
+
+    def encode(self, obj) -> bytes:
+        body = SERIALIZERS[self._serializer_tag][0](obj)
+        # Small payloads are not worth the CPU (and often grow when compressed)
+        if self.compression and len(body) >= self.compress_min_bytes:
+            compress = COMPRESSORS[self._compressor_tag][0]
+            return self._serializer_tag + self._compressor_tag + compress(body)
+        return self._serializer_tag + b"\x00" + body
+
+    @staticmethod
+    def decode(data: bytes):
+        """Decodes any framed payload, whatever codec wrote it."""
+        serializer_tag, compressor_tag = data[:1], data[1:2]
+        if serializer_tag not in SERIALIZERS:
+            # Legacy value written as plain JSON text
+            return json.loads(data)
+        body = COMPRESSORS[compressor_tag][1](data[2:])
+        return SERIALIZERS[serializer_tag][1](body)
+
+# Default for namespaces that were never registered: behaves like the old cache
+DEFAULT_CODEC = PayloadCodec("json")
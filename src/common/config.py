@@ -15,6 +15,53 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # 5. Cache (in-process tier in front of Redis)
+    CACHE_LOCAL_ENABLED: bool = False
+    CACHE_LOCAL_MAX_ITEMS: int = 1024
+    CACHE_LOCAL_TTL: int = 5 # Seconds. Upper bound on staleness if a pub/sub message is lost
+    CACHE_STALE_TTL: int = 30 # Seconds a soft-expired entry may be served while one refresh runs (0 = off)
+    PRINCIPAL_CACHE_TTL: int = 60 # Seconds an authenticated user's id/role/is_active is cached
+
+    # 6. Idempotency
+    IDEMPOTENCY_BACKEND: str = "redis" # "redis" or "database" (idempotency_keys table)
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 64 * 1024 # Larger responses are streamed but not stored
+    IDEMPOTENCY_LOCK_TTL: int = 30 # Seconds. Lease on an in-flight key (self-heals if a worker dies)
+    IDEMPOTENCY_WAIT_SECONDS: float = 5.0 # How long a duplicate waits for the first result (0 = 409 at once)
+
+    # 7. SQL Instrumentation
+    DB_QUERY_DEBUG_HEADER: bool = False # Adds X-DB-Queries / X-DB-Time to responses
+    DB_N_PLUS_ONE_THRESHOLD: int = 10 # Warn when one request repeats a statement this often (0 = off)
+
+    # 8. Profiling (on-demand, production-safe)
+    PROFILING_ENABLED: bool = False # Middleware is not even mounted when False
+    PROFILING_TOKEN: str = "" # Requests with a matching X-Profile-Token header are profiled
+    PROFILING_SAMPLE_RATE: float = 0.0 # Fraction of requests profiled without the header (0.0 - 1.0)
+    PROFILING_DIR: str = "profiles" # Where {request_id}.pstats files are written
+    PROFILING_MAX_FILES: int = 200 # Oldest .pstats files are deleted beyond this (0 = keep all, header-only use)
+
+    # 9. Authorization
+    AUTH_CLAIMS_ONLY: bool = True # Role-gated routes trust verified role/ver claims (no user lookup)
+    JWT_CACHE_MAX_ITEMS: int = 10000 # Verified access tokens kept per worker (0 = verify every time)
+
+    # 10. Password Hashing (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 2 # Threads per app worker (roughly one per spare CPU core)
+    PASSWORD_HASH_MAX_PENDING: int = 32 # Queued + running calls before logins get a fast 503
+
+    # 11. Bulk Import (admin onboarding)
+    BULK_IMPORT_BATCH_SIZE: int = 500 # Rows hashed, then inserted in one transaction
+    BULK_IMPORT_HASH_WORKERS: int = 0 # bcrypt processes shared by all imports (0 = one per CPU)
+
+    # 12. Booking
+    BOOKING_ENGINE: str = "pessimistic" # "pessimistic" (SELECT FOR UPDATE) or "optimistic" (one conditional UPDATE CTE)
+    SLOT_HOLDS_ENABLED: bool = False # Redis lease per slot in front of the booking transaction
+    SLOT_HOLD_TTL_MS: int = 5000 # Lease length. Must comfortably exceed one booking transaction
+    SLOT_HOLD_BOOKED_TTL_MS: int = 10000 # How long a booked slot is rejected in Redis alone (0 = off)
+
+    # 13. Stale Booking Janitor (unpaid PENDING bookings)
+    STALE_BOOKING_TIMEOUT_MINUTES: int = 10 # PENDING bookings older than this are cancelled
+    STALE_BOOKING_JANITOR_MODE: str = "set" # "set" (chunked UPDATE ... RETURNING) or "per_row" (legacy)
+    STALE_BOOKING_BATCH_SIZE: int = 500 # Bookings cancelled per transaction in "set" mode
+
     class Config:
         env_file = ".env"
         extra = "ignore" 
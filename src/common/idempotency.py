@@ -1,67 +1,282 @@
-import json
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, exists, null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from src.common.cache import cache
+from src.common.codecs import PayloadCodec
+from src.common.config import settings
+from src.core.database import engine
+from src.modules.bookings.models import IdempotencyKey
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # 1. SKIP SAFE METHODS (GET, OPTIONS, HEAD)
-        if request.method in ["GET", "HEAD", "OPTIONS"]:
-            return await call_next(request)
+IDEMPOTENCY_TTL = 60 * 60 * 24  # 24 Hours
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# How often a duplicate request re-checks for the first request's result
+WAIT_POLL_INTERVAL = 0.05
+
+# --- STORES ---
+# One engine, two interchangeable backends (IDEMPOTENCY_BACKEND=redis|database).
+# Every operation is ONE round trip:
+#   claim(key)    -> ("stored", record) | ("claimed", None) | ("in_progress", None)
+#   complete(...) -> store the record (24h TTL) and drop our lease
+#   release(...)  -> drop our lease without a record, so a retry can execute
+
+class RedisIdempotencyStore:
+    """Records live at 'idempotency:<key>', leases at 'idempotency:lock:<key>'."""
+
+    # Kept for 24h, so memory per key matters more than the compression CPU
+    codec = PayloadCodec("orjson", compression="zstd")
+
+    # The record check and the SET NX run in ONE script: a predecessor can't
+    # complete between them, so winning the lease means there is no record.
+    _CLAIM_SCRIPT = """
+    local record = redis.call('GET', KEYS[1])
+    if record then return {2, record} end
+    if redis.call('SET', KEYS[2], ARGV[1], 'NX', 'EX', ARGV[2]) then return {1} end
+    return {0}
+    """
+
+    _COMPLETE_SCRIPT = """
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    if redis.call('GET', KEYS[2]) == ARGV[1] then redis.call('DEL', KEYS[2]) end
+    return 1
+    """
+
+    # Delete the lease only if we still own it (it may have expired and been re-claimed)
+    _RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client):
+        self.redis = client
+        self._claim = client.register_script(self._CLAIM_SCRIPT)
+        self._complete = client.register_script(self._COMPLETE_SCRIPT)
+        self._release = client.register_script(self._RELEASE_SCRIPT)
+
+    @staticmethod
+    def _keys(storage_key: str):
+        return [f"idempotency:{storage_key}", f"idempotency:lock:{storage_key}"]
+
+    async def claim(self, storage_key: str, token: str):
+        result = await self._claim(keys=self._keys(storage_key), args=[token, settings.IDEMPOTENCY_LOCK_TTL])
+        if result[0] == 2:
+            return "stored", self.codec.decode(result[1])
+        return ("claimed" if result[0] == 1 else "in_progress"), None
+
+    async def complete(self, storage_key: str, token: str, record: dict):
+        await self._complete(
+            keys=self._keys(storage_key),
+            args=[token, self.codec.encode(record), IDEMPOTENCY_TTL]
+        )
+
+    async def release(self, storage_key: str, token: str):
+        await self._release(keys=self._keys(storage_key)[1:], args=[token])
+
+class DatabaseIdempotencyStore:
+    """
+    Uses the 'idempotency_keys' table. A row is either in flight (lease in
+    locked_until) or stored (response_json). Rows past expires_at count as
+    absent and are removed in batches by purge_expired().
+    """
+
+    async def claim(self, storage_key: str, token: str):
+        now = datetime.now(timezone.utc)
+        locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL)
+        expires_at = now + timedelta(seconds=IDEMPOTENCY_TTL)
+
+        # INSERT the key, or take over a row that expired / whose lease was abandoned
+        claim = (
+            insert(IdempotencyKey)
+            .values(key=storage_key, lock_token=token, locked_until=locked_until, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[IdempotencyKey.key],
+                set_={
+                    "lock_token": token,
+                    "locked_until": locked_until,
+                    "expires_at": expires_at,
+                    "response_json": null(),
+                },
+                where=or_(
+                    IdempotencyKey.expires_at < now,
+                    IdempotencyKey.response_json.is_(None) & (IdempotencyKey.locked_until < now),
+                ),
+            )
+            .returning(IdempotencyKey.key)
+            .cte("claim")
+        )
+        # The scalar subquery sees the snapshot from before the INSERT, i.e. the previous record
+        stmt = select(
+            exists(select(claim.c.key)).label("claimed"),
+            select(IdempotencyKey.response_json)
+            .where(IdempotencyKey.key == storage_key, IdempotencyKey.expires_at >= now)
+            .scalar_subquery()
+            .label("record"),
+        )
+        async with engine.begin() as conn:
+            row = (await conn.execute(stmt)).one()
+
+        if row.claimed:
+            return "claimed", None
+        if row.record is not None:
+            return "stored", row.record
+        return "in_progress", None
+
+    async def complete(self, storage_key: str, token: str, record: dict):
+        stmt = (
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == storage_key, IdempotencyKey.lock_token == token)
+            .values(response_json=record, locked_until=None)
+        )
+        async with engine.begin() as conn:
+            await conn.execute(stmt)
+
+    async def release(self, storage_key: str, token: str):
+        stmt = delete(IdempotencyKey).where(
+            IdempotencyKey.key == storage_key,
+            IdempotencyKey.lock_token == token,
+            IdempotencyKey.response_json.is_(None),
+        )
+        async with engine.begin() as conn:
+            await conn.execute(stmt)
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired keys in small batches so we never hold long locks."""
+        total = 0
+        while True:
+            batch = (
+                select(IdempotencyKey.key)
+                .where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            async with engine.begin() as conn:
+                result = await conn.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(batch)))
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
+def get_idempotency_store():
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    return RedisIdempotencyStore(cache.binary)
+
+idempotency_store = get_idempotency_store()
+
+# --- MIDDLEWARE ---
+class IdempotencyMiddleware:
+    """
+    Raw ASGI middleware (no BaseHTTPMiddleware):
+    - Replays the stored response when an Idempotency-Key was already seen.
+    - Otherwise streams the response to the client as-is while teeing the
+      body chunks into a list, then stores it with ONE write (TTL included).
+    - Responses larger than IDEMPOTENCY_MAX_BODY_BYTES are streamed but not stored.
+    - Concurrent duplicates: the first request claims the key (with a lease);
+      the others wait up to IDEMPOTENCY_WAIT_SECONDS for its result, then get 409.
+      The lease expires on its own if the worker holding it dies.
+    """
+    def __init__(self, app: ASGIApp, max_body_bytes: int = None, store=None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or settings.IDEMPOTENCY_MAX_BODY_BYTES
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # 1. SKIP NON-HTTP AND SAFE METHODS (GET, OPTIONS, HEAD)
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            return await self.app(scope, receive, send)
 
         # 2. CHECK HEADER
-        idem_key = request.headers.get("Idempotency-Key")
+        idem_key = Headers(scope=scope).get("Idempotency-Key")
         if not idem_key:
-            return await call_next(request)
+            return await self.app(scope, receive, send)
 
         # 3. GENERATE STORAGE KEY
-        redis_key = f"idempotency:{request.url.path}:{idem_key}"
-
-        # 4. CHECK CACHE (Hit)
-        cached_response = await cache.get_cached_data(redis_key)
-        if cached_response:
-            return Response(
-                content=cached_response["body"],
-                status_code=cached_response["status_code"],
-                media_type=cached_response["media_type"],
-                headers={"X-Idempotency-Hit": "true"}
-            )
+        storage_key = f"{scope['path']}:{idem_key}"
 
-        # 5. PROCESS REQUEST (Miss)
-        response = await call_next(request)
+        # 4. CHECK + CLAIM IN ONE ROUND TRIP
+        # Duplicates poll for the first result; if the owner finishes without
+        # storing one (e.g. a 500), the next poll claims the key and executes.
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            state, record = await self.store.claim(storage_key, token)
+            if state == "stored":
+                return await self._replay(record, scope, receive, send)
+            if state == "claimed":
+                break
+            if time.monotonic() >= deadline:
+                response = JSONResponse(
+                    status_code=409,
+                    content={"detail": "A request with this Idempotency-Key is already in progress"},
+                    headers={"Retry-After": "1"}
+                )
+                return await response(scope, receive, send)
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
 
-        # 6. CACHE RESPONSE (Only if success)
-        if response.status_code < 500:
-            # --- ROBUST BODY READING (Fixes Test Error) ---
-            response_body_bytes = b""
-
-            # Check if the iterator is Async (Real Server) or Sync (Test Client)
-            if hasattr(response.body_iterator, "__aiter__"):
-                async for chunk in response.body_iterator:
-                    response_body_bytes += chunk
+        record = None
+        try:
+            record = await self._process(scope, receive, send)
+        finally:
+            if record is not None:
+                await self.store.complete(storage_key, token, record)
             else:
-                for chunk in response.body_iterator:
-                    response_body_bytes += chunk
-
-            # Store decoded string for Redis JSON
-            body_str = response_body_bytes.decode()
-
-            # IMPORTANT: We consumed the stream. We must "rewind" it 
-            # so the client/server can read it again. 
-            # We wrap it in an async generator because Starlette expects that.
-            async def re_iterator():
-                yield response_body_bytes
-            
-            response.body_iterator = re_iterator()
-
-            data_to_cache = {
-                "status_code": response.status_code,
-                "body": body_str,
-                "media_type": response.media_type
-            }
-            
-            # TTL: 24 Hours
-            await cache.set_cached_data(redis_key, data_to_cache)
-            await cache.redis.expire(redis_key, 60 * 60 * 24)
-
-        return response
\ No newline at end of file
+                await self.store.release(storage_key, token)
+
+    async def _replay(self, record: dict, scope: Scope, receive: Receive, send: Send):
+        response = Response(
+            content=record["body"],
+            status_code=record["status_code"],
+            media_type=record["media_type"],
+            headers={"X-Idempotency-Hit": "true"}
+        )
+        await response(scope, receive, send)
+
+    async def _process(self, scope: Scope, receive: Receive, send: Send):
+        """Runs the request; returns the record to store, or None if it must not be stored."""
+        # 5. PROCESS REQUEST (Miss) - tee the body while streaming it out
+        captured = {"status_code": None, "media_type": None}
+        chunks = []
+        body_size = 0
+        cacheable = True
+
+        async def send_and_capture(message: Message):
+            nonlocal body_size, cacheable
+            if message["type"] == "http.response.start":
+                captured["status_code"] = message["status"]
+                captured["media_type"] = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body" and cacheable:
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size > self.max_body_bytes:
+                    # Too big to keep for 24h: stop buffering, keep streaming
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+        # 6. BUILD RECORD (Only if success and small enough)
+        status_code = captured["status_code"]
+        if not cacheable or status_code is None or status_code >= 500:
+            return None
+
+        try:
+            body_str = b"".join(chunks).decode()
+        except UnicodeDecodeError:
+            return None # Binary bodies are not replayable from the JSON record
+
+        return {
+            "status_code": status_code,
+            "body": body_str,
+            "media_type": captured["media_type"]
+        }
@@ -0,0 +1,54 @@
+import hashlib
+import time
+from collections import OrderedDict
+from src.common.config import settings
+from src.core.metrics import JWT_DECODE_CACHE
+
+class VerifiedTokenCache:
+    """
+    Per-worker, bounded LRU of access tokens whose signature was already verified.
+    Keyed by the SHA-256 of the token (we never keep raw tokens around) and
+    evicted at the token's own `exp`, so a cached token can't outlive its validity.
+    Returned claims are shared: callers must treat them as read-only.
+    """
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._entries = OrderedDict() # digest -> (exp, claims)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str):
+        if self.max_items <= 0:
+            return None
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            JWT_DECODE_CACHE.labels("miss").inc()
+            return None
+        exp, claims = entry
+        if exp <= time.time():
+            del self._entries[digest]
+            JWT_DECODE_CACHE.labels("miss").inc()
+            return None
+        self._entries.move_to_end(digest)
+        JWT_DECODE_CACHE.labels("hit").inc()
+        return claims
+
+    def set(self, token: str, claims: dict):
+        # Tokens without an expiry are never cached
+        exp = claims.get("exp")
+        if self.max_items <= 0 or not isinstance(exp, (int, float)):
+            return
+        digest = self._digest(token)
+        self._entries[digest] = (exp, claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+# Global Instance
+verified_tokens = VerifiedTokenCache(settings.JWT_CACHE_MAX_ITEMS)
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime, timezone
+from uuid import UUID
+from fastapi import HTTPException
+
+# Keyset ("seek") pagination helpers.
+# A cursor is the sort key of the last row of a page, e.g. (start_time, id),
+# encoded as opaque URL-safe base64. The next page is `WHERE (a, b) > cursor`,
+# which is an index range scan no matter how deep the client pages
+# (unlike OFFSET, which reads and throws away every skipped row).
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Decodes a cursor made by encode_cursor, converting each value with the
+    matching callable in `types` (e.g. datetime.fromisoformat, UUID).
+    Tampered or malformed cursors are a 400, never a 500.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong arity")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(rows: list, limit: int, key):
+    """
+    `rows` must be fetched with LIMIT limit + 1. Returns (page, next_cursor);
+    next_cursor is None on the last page. `key(row)` returns the sort key tuple.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*key(page[-1]))
+
+def as_utc(value: datetime = None):
+    """Query-string datetimes may come without an offset: those are read as UTC."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,55 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from src.common.config import settings
+from src.common.utils import verify_password, get_password_hash
+from src.core.logger import setup_logger
+from src.core.metrics import PASSWORD_HASH_QUEUE_DEPTH, PASSWORD_HASH_REJECTED
+
+logger = setup_logger("password_hasher")
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so it never blocks the event loop.
+    (The bcrypt C extension releases the GIL, so threads give real parallelism.)
+
+    Backpressure: at most `max_pending` calls may be queued or running; beyond
+    that we fail fast with 503 instead of letting a login storm build an
+    unbounded backlog that every other request waits behind.
+    """
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.max_pending = max_pending
+        self._pending = 0
+
+    async def _run(self, fn, *args):
+        # 1. Backpressure (fast 503, no queueing)
+        if self._pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.inc()
+            logger.warning("⚠️ Password hashing pool saturated, rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        # 2. Hand off to the pool
+        self._pending += 1
+        PASSWORD_HASH_QUEUE_DEPTH.set(self._pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_QUEUE_DEPTH.set(self._pending)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Global Instance
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
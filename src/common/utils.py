@@ -1,3 +1,5 @@
+import hashlib
+import uuid
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
@@ -16,26 +18,35 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 # 2. Token Generation Setup
+# The 'type' claim: each token is only accepted where it belongs
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Creates a short-lived Access Token (JWT)."""
+    """Creates a short-lived Access Token (JWT). 'type' keeps it from being used as a refresh token."""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS_TOKEN_TYPE})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Creates a long-lived Refresh Token (JWT)."""
+    """Creates a long-lived Refresh Token (JWT). The 'jti' makes every token unique; 'type' keeps it off Bearer auth."""
     to_encode = data.copy()
+    to_encode.setdefault("jti", str(uuid.uuid4()))
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": REFRESH_TOKEN_TYPE})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def hash_token(token: str) -> str:
+    """SHA-256 digest stored instead of the raw refresh token."""
+    return hashlib.sha256(token.encode()).hexdigest()
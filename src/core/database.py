@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from src.common.config import settings
+from src.core.db_instrumentation import install_query_hooks
 
 # 1. Create the Database Engine
 # We use settings.DATABASE_URL which comes from your .env file
@@ -11,6 +12,9 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+# Per-request query count / DB time (see src/core/db_instrumentation.py)
+install_query_hooks(engine)
+
 # 2. Create the Session Factory
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -0,0 +1,114 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.common.config import settings
+from src.core.logger import setup_logger
+from src.core.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST
+
+logger = setup_logger("db_instrumentation")
+
+class QueryStats:
+    """SQL statements executed in one unit of work (usually one request)."""
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        # Statement text is already parameterized, so it doubles as the "shape"
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement] += 1
+
+    def repeated_statements(self, threshold: int):
+        return [(stmt, n) for stmt, n in self.shapes.items() if n >= threshold]
+
+# Stats of the current request. None outside a tracked scope (e.g. startup).
+query_stats_var: ContextVar = ContextVar("query_stats", default=None)
+
+# --- ENGINE HOOKS ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute: pop its start time
+    # here (or it stays on the pooled connection for good) and still count it
+    conn = context.connection
+    starts = conn.info.get("query_start_time") if conn is not None else None
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = query_stats_var.get()
+    if stats is not None and context.statement is not None:
+        stats.record(context.statement, duration)
+
+def install_query_hooks(engine):
+    """Attach the timing hooks to an (async) engine. Safe to call once per engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+def report_query_stats(label: str, stats: QueryStats):
+    """Export to Prometheus and warn about likely N+1 patterns."""
+    DB_QUERIES_PER_REQUEST.labels(label).observe(stats.count)
+    DB_TIME_PER_REQUEST.labels(label).observe(stats.total_time)
+
+    threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+    if threshold > 0:
+        for statement, repeats in stats.repeated_statements(threshold):
+            logger.warning("Possible N+1 query", extra={
+                "route": label,
+                "repeats": repeats,
+                "statement": statement[:500],
+            })
+
+# --- MIDDLEWARE ---
+def _route_label(scope: Scope) -> str:
+    """Route template (e.g. '/consultations/prescriptions/{booking_id}') to keep label cardinality low."""
+    route = scope.get("route")
+    if route is None:
+        # Older Starlette versions don't put the matched route in the scope
+        for candidate in getattr(scope.get("app"), "routes", []):
+            if candidate.matches(scope)[0].name == "FULL":
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+class DBQueryMetricsMiddleware:
+    """
+    Raw ASGI middleware: counts SQL statements and DB time per request.
+    Exposed as Prometheus histograms by route and, when DB_QUERY_DEBUG_HEADER
+    is on, as X-DB-Queries / X-DB-Time response headers.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = query_stats_var.set(stats)
+
+        async def send_with_db_headers(message: Message):
+            if message["type"] == "http.response.start" and settings.DB_QUERY_DEBUG_HEADER:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time"] = f"{stats.total_time * 1000:.2f}ms"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_db_headers)
+        finally:
+            query_stats_var.reset(token)
+            report_query_stats(_route_label(scope), stats)
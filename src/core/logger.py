@@ -1,24 +1,66 @@
+import atexit
 import logging
+import queue
 import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
 from pythonjsonlogger import jsonlogger
 
+# Correlation ID of the current request (set by RequestIDMiddleware).
+# ContextVars follow asyncio tasks, so every log line emitted while handling
+# a request (services, repositories, ...) picks it up automatically.
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on records that don't carry one explicitly."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+# All loggers share ONE queue. The event loop only enqueues records; a
+# background thread (QueueListener) does the formatting and the stdout I/O.
+_log_queue = queue.SimpleQueue()
+_listener = None
+
+def _get_listener() -> QueueListener:
+    global _listener
+    if _listener is None:
+        handler = logging.StreamHandler(sys.stdout)
+
+        # FORMAT: JSON Structure
+        # We include 'request_id' for correlation (Phase 16 requirement)
+        formatter = jsonlogger.JsonFormatter(
+            "%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s"
+        )
+        handler.setFormatter(formatter)
+
+        _listener = QueueListener(_log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_log_listener)
+    return _listener
+
+def stop_log_listener():
+    """Flush and stop the background log writer (called on shutdown)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 def setup_logger(name: str):
     logger = logging.getLogger(name)
-    
+
     # Prevent duplicate logs if already set up
     if logger.hasHandlers():
         return logger
-        
-    handler = logging.StreamHandler(sys.stdout)
-    
-    # FORMAT: JSON Structure
-    # We include 'trace_id' for correlation (Phase 16 requirement)
-    formatter = jsonlogger.JsonFormatter(
-        "%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s"
-    )
-    
-    handler.setFormatter(formatter)
+
+    _get_listener()
+
+    # The filter runs on the caller's side, where the request context is visible
+    handler = QueueHandler(_log_queue)
+    handler.addFilter(RequestIdFilter())
+
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
-    
-    return logger
\ No newline at end of file
+
+    return logger
@@ -0,0 +1,65 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# All custom metrics live here so they are registered exactly once.
+# They are exported on /metrics by the Instrumentator (default registry).
+
+# --- CACHE ---
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups per tier (local = in-process LRU, redis = shared)",
+    ["tier", "namespace", "result"],
+)
+
+JWT_DECODE_CACHE = Counter(
+    "jwt_decode_cache_total",
+    "Lookups in the per-worker cache of already-verified access tokens",
+    ["result"],
+)
+
+# --- DATABASE (per request, labelled by route template) ---
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Cumulative time spent in SQL statements while handling one request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# --- PASSWORD HASHING (bcrypt worker pool) ---
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_pending",
+    "bcrypt hash/verify calls queued or running in the worker pool",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "bcrypt calls rejected with 503 because the worker pool was saturated",
+)
+
+# --- BOOKINGS ---
+BOOKING_ATTEMPTS = Counter(
+    "booking_attempts_total",
+    "Booking attempts per engine (multi = multi-slot) and outcome (booked, conflict, rejected, error)",
+    ["engine", "result"],
+)
+SLOT_HOLDS = Counter(
+    "slot_holds_total",
+    "Redis slot hold attempts (acquired, rejected without touching Postgres, bypassed when Redis is down)",
+    ["result"],
+)
+
+# --- BACKGROUND JOBS ---
+STALE_BOOKING_JANITOR_ROWS = Histogram(
+    "stale_booking_janitor_rows",
+    "PENDING bookings cancelled by one run of the stale booking janitor",
+    buckets=(0, 1, 10, 100, 500, 1000, 5000, 10000, 50000),
+)
+STALE_BOOKING_JANITOR_DURATION = Histogram(
+    "stale_booking_janitor_duration_seconds",
+    "Wall time of one run of the stale booking janitor",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
@@ -1,46 +1,63 @@
 import uuid
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-from src.core.logger import setup_logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.logger import setup_logger, request_id_var
 
 logger = setup_logger("middleware")
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class RequestIDMiddleware:
+    """
+    Raw ASGI middleware (no BaseHTTPMiddleware, no extra task per request).
+    Puts the request id in a ContextVar so every log line gets it, times the
+    request and echoes the id back in X-Request-ID.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
         # 1. Generate Request ID (Trace Context)
         request_id = str(uuid.uuid4())
-        
+
         # 2. Add to Logger Context (So all logs know this ID)
-        # Note: In a real production app, use contextvars for thread safety.
-        # For this assignment, we pass it via headers/logs manually if needed.
-        
+        token = request_id_var.set(request_id)
+        scope.setdefault("state", {})["request_id"] = request_id
+
         # 3. Time the Request (Latency Metric)
-        start_time = time.time()
-        
-        # 4. Process Request
-        response = await call_next(request)
-        
-        # 5. Calculate Duration
-        process_time = time.time() - start_time
-        
-        # 6. Log Structured JSON
-        # No PII (Don't log email/password bodies)
-        log_data = {
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "duration": round(process_time, 4),
-            "request_id": request_id
-        }
-        
-        # Log 500s as Errors, 200s as Info
-        if response.status_code >= 500:
-            logger.error("Request Failed", extra=log_data)
-        else:
-            logger.info("Request Completed", extra=log_data)
-            
-        # 7. Propagate Request ID to Client (Correlation)
-        response.headers["X-Request-ID"] = request_id
-        
-        return response
\ No newline at end of file
+        start_time = time.perf_counter()
+        status_code = 500 # If the app raises before responding
+
+        async def send_with_request_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 4. Propagate Request ID to Client (Correlation)
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            # 5. Process Request
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # 6. Calculate Duration
+            process_time = time.perf_counter() - start_time
+
+            # 7. Log Structured JSON
+            # No PII (Don't log email/password bodies)
+            log_data = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration": round(process_time, 4),
+            }
+
+            # Log 500s as Errors, 200s as Info
+            if status_code >= 500:
+                logger.error("Request Failed", extra=log_data)
+            else:
+                logger.info("Request Completed", extra=log_data)
+
+            request_id_var.reset(token)
@@ -0,0 +1,95 @@
+import cProfile
+import hmac
+import os
+import random
+import threading
+import time
+import uuid
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.common.config import settings
+from src.core.logger import setup_logger, request_id_var
+
+logger = setup_logger("profiling")
+
+PROFILE_HEADER = b"x-profile-token"
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and dumps a .pstats file named after
+    the request id. Only mounted when PROFILING_ENABLED is set (see main.py), so
+    a disabled hook costs nothing.
+
+    A request is profiled when it carries a valid X-Profile-Token header or is
+    picked by PROFILING_SAMPLE_RATE. cProfile records the whole thread, so only
+    one request is profiled at a time; overlapping ones run normally.
+
+    Sampling writes one file per picked request forever, so at most
+    PROFILING_MAX_FILES are kept (oldest deleted first); a nonzero sample rate
+    without that cap is refused at startup.
+    """
+    def __init__(self, app: ASGIApp):
+        if settings.PROFILING_SAMPLE_RATE > 0 and settings.PROFILING_MAX_FILES <= 0:
+            raise ValueError("PROFILING_SAMPLE_RATE > 0 needs PROFILING_MAX_FILES > 0 (or the disk fills up)")
+        self.app = app
+        self.output_dir = settings.PROFILING_DIR
+        self.max_files = settings.PROFILING_MAX_FILES
+        self._busy = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def _prune(self):
+        """Deletes the oldest .pstats files beyond max_files."""
+        if self.max_files <= 0:
+            return
+        try:
+            with os.scandir(self.output_dir) as entries:
+                files = sorted((e.stat().st_mtime, e.path) for e in entries if e.name.endswith(".pstats"))
+        except OSError:
+            return # e.g. another worker deleted a file mid-scan: prune next time
+        for _, path in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass # Already gone (another worker pruned it)
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        token = settings.PROFILING_TOKEN
+        if token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, token.encode())
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        # 1. One profiler at a time (cProfile is per thread, the loop is one thread)
+        if not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profiler = cProfile.Profile()
+        start_time = time.perf_counter()
+        try:
+            # 2. Profile the request
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+        finally:
+            self._busy.release()
+            # 3. Dump, tagged with the request id (set by RequestIDMiddleware)
+            request_id = request_id_var.get() or str(uuid.uuid4())
+            path = os.path.join(self.output_dir, f"{request_id}.pstats")
+            try:
+                profiler.dump_stats(path)
+                self._prune()
+                logger.info("🔬 Request profiled", extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "duration": round(time.perf_counter() - start_time, 4),
+                    "profile": path,
+                })
+            except OSError as e:
+                logger.error(f"❌ Could not write profile: {e}")
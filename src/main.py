@@ -8,6 +8,8 @@ from src.common.cache import cache
 # --- NEW IMPORTS ---
 from prometheus_fastapi_instrumentator import Instrumentator
 from src.core.middleware import RequestIDMiddleware
+from src.core.db_instrumentation import DBQueryMetricsMiddleware
+from src.core.profiling import ProfilingMiddleware
 # -------------------
 
 from src.modules.auth.router import router as auth_router
@@ -15,10 +17,14 @@ from src.modules.availability.router import router as availability_router
 from src.modules.bookings.router import router as booking_router
 from src.modules.payment.router import router as payment_router
 from src.modules.bookings.jobs import cancel_stale_bookings
+from src.modules.auth.jobs import purge_expired_refresh_tokens
 from src.modules.consultations.router import router as consultation_router
 from src.modules.doctors.router import router as doctors_router
 from src.modules.admin.router import router as admin_router
-from src.common.idempotency import IdempotencyMiddleware
+from src.common.idempotency import IdempotencyMiddleware, DatabaseIdempotencyStore
+from src.common.config import settings
+from src.common.password_hasher import password_hasher
+from src.modules.auth.bulk_import import hash_pool
 
 scheduler = AsyncIOScheduler()
 
@@ -26,14 +32,23 @@ scheduler = AsyncIOScheduler()
 async def lifespan(app: FastAPI):
     print("🚀 LIFESPAN STARTING...")
     await FastAPILimiter.init(cache.redis)
+    await cache.start()
+    hash_pool.start()
     
     scheduler.add_job(cancel_stale_bookings, 'interval', seconds=60)
+    scheduler.add_job(purge_expired_refresh_tokens, 'interval', hours=1)
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        # Redis expires keys itself; the table needs a sweeper
+        scheduler.add_job(DatabaseIdempotencyStore().purge_expired, 'interval', minutes=10)
     scheduler.start()
     
     yield
     
     print("🛑 SHUTDOWN...")
     scheduler.shutdown()
+    await cache.stop()
+    password_hasher.shutdown()
+    hash_pool.shutdown()
 
 app = FastAPI(
     title="Amrutam Telemedicine API",
@@ -45,6 +60,12 @@ app = FastAPI(
 Instrumentator().instrument(app).expose(app)
 
 # --- 2. ADD REQUEST ID MIDDLEWARE ---
+# Per-request SQL count/time. Added first so it runs INSIDE RequestIDMiddleware
+# and its N+1 warnings carry the request id.
+app.add_middleware(DBQueryMetricsMiddleware)
+# On-demand cProfile. Only mounted when enabled, so there is zero overhead otherwise.
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 # Must be added BEFORE other middleware to catch everything
 app.add_middleware(RequestIDMiddleware)
 
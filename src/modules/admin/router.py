@@ -1,43 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from uuid import UUID
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import get_db
 from src.modules.admin.service import AdminService
+from src.modules.auth.bulk_import import BulkImportService, parse_rows
+from src.modules.auth.repository import AuthRepository
+from src.modules.auth.schemas import AccountUpdate, UserResponse
+from src.modules.auth.service import AuthService
 # We reuse the auth logic to identify the user
-from src.modules.consultations.router import get_current_user 
+from src.modules.auth.dependencies import require_role
 
 router = APIRouter(prefix="/admin", tags=["Admin & Analytics"])
 
-# --- DEPENDENCY: STRICT ADMIN CHECK (FIXED) ---
-def require_admin(current_user = Depends(get_current_user)):
-    # 1. Safely extract the role
-    role = getattr(current_user, "role", None)
-    if role is None and isinstance(current_user, dict):
-        role = current_user.get("role")
-    
-    # 2. Debugging: Print exactly what we got (Look at Docker Logs if this fails)
-    print(f"🔍 ADMIN CHECK DEBUG -> User ID: {getattr(current_user, 'id', 'Unknown')}")
-    print(f"🔍 ADMIN CHECK DEBUG -> Raw Role: {role} (Type: {type(role)})")
-
-    # 3. Normalize the Role to a simple string
-    role_str = ""
-    if hasattr(role, "value"):
-        # If it's an Enum (UserRole.ADMIN), extract the value "admin"
-        role_str = str(role.value).lower()
-    else:
-        # If it's already a string, just lower it
-        role_str = str(role).lower()
-
-    print(f"🔍 ADMIN CHECK DEBUG -> Normalized Role: '{role_str}'")
-
-    # 4. The Comparison
-    # We accept 'admin' (standard) or 'userrole.admin' (just in case str() behaved weirdly)
-    if role_str not in ["admin", "userrole.admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Access denied. Admin privileges required. (Detected role: {role_str})"
-        )
-    
-    return current_user
+# --- DEPENDENCY: STRICT ADMIN CHECK ---
+# Authorized from the verified token claims (see require_role)
+require_admin = require_role("admin")
 
 # --- ROUTES ---
 @router.get("/analytics/consultations")
@@ -64,4 +43,41 @@ async def doctor_utilization(
     _: dict = Depends(require_admin)
 ):
     service = AdminService(db)
-    return await service.get_doctor_stats(limit)
\ No newline at end of file
+    return await service.get_doctor_stats(limit)
+
+# --- ACCOUNTS ---
+@router.patch("/users/{user_id}", response_model=UserResponse)
+async def update_account(
+    user_id: UUID,
+    data: AccountUpdate,
+    db: AsyncSession = Depends(get_db),
+    admin = Depends(require_admin)
+):
+    """
+    Change a user's role or (de)activate them. Their outstanding access
+    tokens stop working on the next request.
+    """
+    service = AuthService(AuthRepository(db))
+    return await service.update_account(admin.id, user_id, role=data.role, is_active=data.is_active)
+
+# --- ONBOARDING ---
+@router.post("/users/import")
+async def bulk_import_users(
+    file: UploadFile = File(...),
+    format: str = None,
+    _: dict = Depends(require_admin)
+):
+    """
+    Bulk-creates users (+ profiles / doctor profiles) from CSV or NDJSON.
+    Streams one NDJSON result line per input row, then a summary line.
+    """
+    fmt = format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    content = await file.read()
+
+    async def results():
+        async for result in BulkImportService().import_rows(parse_rows(content, fmt)):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,207 @@
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from src.core.database import engine
+from src.common.cache import cache
+from src.common.config import settings
+from src.common.utils import get_password_hash
+from src.core.logger import setup_logger
+from src.modules.auth.models import User, UserRole
+from src.modules.auth.schemas import BulkUserRow
+from src.modules.doctors.service import DOCTORS_CACHE_NAMESPACE
+
+logger = setup_logger("bulk_import")
+
+PROFILE_COLUMNS = ["id", "user_id", "full_name", "phone_number"]
+DOCTOR_PROFILE_COLUMNS = ["id", "user_id", "specialization", "experience_years", "consultation_fee", "is_verified_by_admin"]
+
+def parse_rows(content: bytes, fmt: str):
+    """Yields (row_number, dict) from CSV (header row) or NDJSON content."""
+    text = content.decode("utf-8-sig")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            # Empty CSV cells mean "not provided"
+            yield number, {k: v for k, v in row.items() if k and v not in ("", None)}
+    elif fmt == "ndjson":
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, e
+                continue
+            yield number, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+    else:
+        raise ValueError(f"Unsupported format '{fmt}' (use csv or ndjson)")
+
+class HashPool:
+    """
+    The bcrypt process pool shared by every bulk import. Started once (app
+    lifespan / CLI) instead of spawning fresh interpreters per import.
+    'spawn': never fork a process that runs an event loop and threads.
+    """
+    def __init__(self, workers: int = None):
+        self.workers = workers or settings.BULK_IMPORT_HASH_WORKERS or os.cpu_count()
+        self._executor = None
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Tolerates callers that never ran start() (e.g. a one-off script)
+        self.start()
+        return self._executor
+
+    async def hash_all(self, passwords: list) -> list:
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[loop.run_in_executor(self.executor, get_password_hash, p) for p in passwords])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global Instance (started / shut down in the app lifespan)
+hash_pool = HashPool()
+
+class BulkImportService:
+    """
+    Onboards thousands of users (and their Profile / DoctorProfile rows) at once.
+    Per batch: 1 SELECT for existing emails, bcrypt on a process pool, then
+    1 multi-row INSERT for users and COPY for the profile tables in ONE short
+    transaction. Results are yielded per row so callers can stream them.
+    """
+    def __init__(self, batch_size: int = None, pool: HashPool = None):
+        self.batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+        self.pool = pool or hash_pool
+
+    async def import_rows(self, rows):
+        """Async generator of {"row", "email", "status", ...} dicts, then a final summary."""
+        summary = {"summary": True, "created": 0, "failed": 0}
+        batch = []
+        for number, row in rows:
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                async for result in self._import_batch(batch, summary):
+                    yield result
+                batch = []
+        if batch:
+            async for result in self._import_batch(batch, summary):
+                yield result
+
+        # New doctors must show up in search
+        if summary["created"]:
+            await cache.invalidate_namespace(DOCTORS_CACHE_NAMESPACE)
+        logger.info(f"📥 Bulk import finished: {summary['created']} created, {summary['failed']} failed")
+        yield summary
+
+    async def _import_batch(self, batch, summary):
+        results = []
+
+        # 1. Validate
+        valid = {}
+        for number, row in batch:
+            error = None
+            if isinstance(row, Exception):
+                error = str(row)
+            else:
+                try:
+                    user = BulkUserRow(**row)
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                else:
+                    if user.email in valid:
+                        error = "Duplicate email in file"
+                    else:
+                        valid[user.email] = (number, user)
+            if error is not None:
+                email = row.get("email") if isinstance(row, dict) else None
+                results.append({"row": number, "email": email, "status": "error", "error": error})
+
+        try:
+            created = await self._insert(valid) if valid else {}
+        except Exception as e:
+            # The batch is one transaction: nothing from it was written
+            logger.error(f"❌ Bulk import batch failed: {e}")
+            created = {}
+            for email, (number, _) in valid.items():
+                results.append({"row": number, "email": email, "status": "error", "error": "Batch failed, retry"})
+            valid = {}
+
+        # 6. Report (only after the transaction committed)
+        for email, (number, user) in valid.items():
+            if email in created:
+                results.append({"row": number, "email": email, "status": "created", "id": str(created[email]), "role": user.role})
+            else:
+                results.append({"row": number, "email": email, "status": "error", "error": "Email already registered"})
+
+        for result in sorted(results, key=lambda r: r["row"]):
+            summary["created" if result["status"] == "created" else "failed"] += 1
+            yield result
+
+    async def _insert(self, valid: dict) -> dict:
+        """Writes one batch in ONE transaction. Returns {email: user_id} for created users."""
+        # 2. Existing accounts (one query for the whole batch, outside the transaction)
+        async with engine.connect() as conn:
+            result = await conn.execute(select(User.email).where(User.email.in_(list(valid))))
+            existing = set(result.scalars())
+        new = {email: row for email, row in valid.items() if email not in existing}
+        if not new:
+            return {}
+
+        # 3. Hash in parallel BEFORE opening the transaction: bcrypt takes seconds
+        # per batch and must not hold a pooled connection "idle in transaction"
+        hashes = await self.pool.hash_all([user.password for _, user in new.values()])
+
+        async with engine.begin() as conn:
+            # 4. Users: one multi-row INSERT. ON CONFLICT covers a concurrent registration
+            # (including one that happened while we were hashing).
+            user_rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "email": email,
+                    "password_hash": password_hash,
+                    "role": UserRole(user.role),
+                    "is_active": True,
+                    "is_verified": False,
+                }
+                for (email, (_, user)), password_hash in zip(new.items(), hashes)
+            ]
+            stmt = (
+                insert(User)
+                .values(user_rows)
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(User.id, User.email)
+            )
+            created = {email: user_id for user_id, email in (await conn.execute(stmt)).all()}
+
+            # 5. Profiles via COPY (rows are brand new, nothing can conflict)
+            profiles, doctor_profiles = [], []
+            for email, user_id in created.items():
+                _, user = new[email]
+                profiles.append((uuid.uuid4(), user_id, user.full_name, user.phone_number))
+                if user.role == "doctor":
+                    doctor_profiles.append((
+                        uuid.uuid4(), user_id, user.specialization, user.experience_years,
+                        Decimal(str(user.consultation_fee)), False
+                    ))
+
+            raw = (await conn.get_raw_connection()).driver_connection
+            if profiles:
+                await raw.copy_records_to_table("profiles", records=profiles, columns=PROFILE_COLUMNS)
+            if doctor_profiles:
+                await raw.copy_records_to_table("doctor_profiles", records=doctor_profiles, columns=DOCTOR_PROFILE_COLUMNS)
+
+            return created
@@ -1,3 +1,4 @@
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # <--- CHANGED
 from jose import jwt, JWTError
@@ -5,37 +6,149 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import get_db
 from src.modules.auth.repository import AuthRepository
 from src.common.config import settings
-from src.modules.auth.models import User
+from src.common.cache import cache
+from src.common.jwt_cache import verified_tokens
+from src.common.utils import ACCESS_TOKEN_TYPE
+from src.modules.auth.models import User, UserRole
 
 # Changed from OAuth2PasswordBearer to HTTPBearer for simpler "Paste Token" UI
 security = HTTPBearer() 
 
-async def get_current_user(
-    token_obj: HTTPAuthorizationCredentials = Depends(security), # <--- CHANGED
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+# --- PRINCIPAL CACHE ---
+# Authorization only needs id / role / is_active, so we cache that instead of
+# loading User + Profile + DoctorProfile (3 queries) on every request.
+# Invalidate with: await invalidate_principal(user_id)
+# (profile update, role change, deactivation).
+PRINCIPAL_CACHE_NAMESPACE = "principals"
+cache.register_namespace(PRINCIPAL_CACHE_NAMESPACE, local=True)
+
+class Principal:
+    """The authenticated user as seen by dependencies (NOT an ORM object)."""
+    def __init__(self, id, email: str, role, is_active: bool):
+        self.id = uuid.UUID(str(id))
+        self.email = email
+        self.role = UserRole(role)
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.email, user.role, user.is_active)
+
+    def to_cache(self) -> dict:
+        return {"id": str(self.id), "email": self.email, "role": self.role.value, "is_active": self.is_active}
+
+async def load_principal(db: AsyncSession, user_id: str):
+    """Cache first; only a miss touches the database (a single users row)."""
+    cached = await cache.get_cached_data(PRINCIPAL_CACHE_NAMESPACE, user_id)
+    if cached is not None:
+        return Principal(**cached)
+
+    user = await AuthRepository(db).get_user_by_id(user_id)
+    if user is None:
+        return None
+
+    principal = Principal.from_user(user)
+    await cache.set_cached_data(
+        PRINCIPAL_CACHE_NAMESPACE, user_id, principal.to_cache(), ttl=settings.PRINCIPAL_CACHE_TTL
+    )
+    return principal
+
+async def invalidate_principal(user_id):
+    await cache.delete(PRINCIPAL_CACHE_NAMESPACE, str(user_id))
+
+# --- TOKEN VERSION (cheap revocation for claims-only auth) ---
+# Access tokens carry "ver". Bumping the user's version (role change,
+# deactivation, refresh-token theft) rejects every outstanding access token
+# on its next use. users.token_version is the source of truth; Redis holds a
+# copy so the check is one GET. A missing Redis key means "unknown" (evicted,
+# flushed): it is re-read from the database, never assumed to be 0.
+def _token_version_key(user_id) -> str:
+    return f"auth:token_version:{user_id}"
+
+# Never lowers the stored version (a slow reader can't undo a concurrent bump)
+_PUBLISH_VERSION_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+local version = tonumber(ARGV[1])
+if current == nil or version > current then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return version
+end
+return current
+"""
+_publish_version = cache.redis.register_script(_PUBLISH_VERSION_SCRIPT)
+
+async def get_token_version(user_id):
+    """Redis copy only. None if the key is missing."""
+    version = await cache.redis.get(_token_version_key(user_id))
+    return int(version) if version is not None else None
+
+async def publish_token_version(user_id, version: int) -> int:
+    """Stores the version in Redis (if newer) and returns the effective one."""
+    return int(await _publish_version(keys=[_token_version_key(user_id)], args=[version]))
+
+async def current_token_version(db: AsyncSession, user_id):
+    """Redis first; on a missing key, the database (and re-seed Redis). None if no such user."""
+    version = await get_token_version(user_id)
+    if version is None:
+        version = await AuthRepository(db).get_token_version(user_id)
+        if version is None:
+            return None
+        version = await publish_token_version(user_id, version)
+    return version
+
+async def bump_token_version(db: AsyncSession, user_id):
+    """
+    Revokes every outstanding access token of the user. Does NOT commit: Redis
+    is updated first, so a failed commit errs on the side of rejecting tokens.
+    """
+    version = await AuthRepository(db).bump_token_version(user_id)
+    if version is not None:
+        await publish_token_version(user_id, version)
+        await invalidate_principal(user_id)
+    return version
+
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    # Extract the token string from the security object
-    token = token_obj.credentials 
+
+def decode_access_token(token: str) -> dict:
+    """Verifies the signature/expiry and returns the claims (sub is a valid UUID, type is 'access')."""
+    # Same token seen before (and not expired yet): skip the HMAC verification
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
 
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        # A refresh token is signed with the same key: never accept it as a Bearer token
+        if user_id is None or payload.get("type") != ACCESS_TOKEN_TYPE:
+            raise _credentials_exception()
+        uuid.UUID(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+    verified_tokens.set(token, payload)
+    return payload
+
+async def get_current_user(
+    token_obj: HTTPAuthorizationCredentials = Depends(security), # <--- CHANGED
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    # Extract the token string from the security object
+    payload = decode_access_token(token_obj.credentials)
+
+    # Revoked (role change, deactivation, theft)?
+    if payload.get("ver") != await current_token_version(db, payload["sub"]):
+        raise _credentials_exception("Token revoked")
 
-    repository = AuthRepository(db)
-    user = await repository.get_full_user_details(user_id)
+    user = await load_principal(db, payload["sub"])
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -43,17 +156,37 @@ async def get_current_user(
     return user
 
 def require_role(required_role: str):
-    def role_checker(current_user: User = Depends(get_current_user)):
-        if not current_user.is_active:
-             raise HTTPException(status_code=400, detail="Inactive user")
-
-        # Handle Enum vs String comparison
-        user_role_value = current_user.role.value if hasattr(current_user.role, 'value') else current_user.role
-        
-        if user_role_value != required_role:
+    """
+    Role gate. With AUTH_CLAIMS_ONLY, tokens carrying "role" + "ver" are
+    authorized from the verified claims plus ONE Redis GET (token version);
+    older tokens, or a version missing from Redis, fall back to the principal lookup.
+    """
+    async def role_checker(
+        token_obj: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_db)
+    ) -> Principal:
+        payload = decode_access_token(token_obj.credentials)
+
+        # 1. Fast Path: claims only (no DB, no principal cache)
+        version = None
+        if settings.AUTH_CLAIMS_ONLY and "role" in payload and "ver" in payload:
+            version = await get_token_version(payload["sub"])
+            if version is not None and version != payload["ver"]:
+                raise _credentials_exception("Token revoked")
+
+        if version is not None:
+            # Matching version => no role change / deactivation since the token was
+            # issued (both bump it), so role and is_active can come from the claims.
+            current_user = Principal(payload["sub"], None, payload["role"], True)
+
+        # 2. Slow Path (or version unknown to Redis): load the principal + version from the DB
+        else:
+            current_user = await get_current_user(token_obj, db)
+
+        if current_user.role.value != required_role:
              raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Role {required_role} required"
             )
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
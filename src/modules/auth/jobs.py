@@ -0,0 +1,23 @@
+import uuid
+from src.core.logger import setup_logger, request_id_var
+from src.core.database import AsyncSessionLocal
+from src.modules.auth.repository import AuthRepository
+
+logger = setup_logger("background_worker")
+
+async def purge_expired_refresh_tokens(batch_size: int = 1000):
+    """
+    Background Sweeper: deletes expired refresh tokens in batches.
+    Revoked-but-unexpired rows are kept on purpose: they are what lets
+    rotate_tokens detect reuse of a stolen token.
+    """
+    request_id_var.set(f"token-sweeper-{uuid.uuid4()}")
+
+    async with AsyncSessionLocal() as db:
+        try:
+            deleted = await AuthRepository(db).purge_expired_refresh_tokens(batch_size)
+            if deleted:
+                logger.info(f"🧹 Purged {deleted} expired refresh tokens.")
+        except Exception as e:
+            logger.error(f"🚨 Refresh token sweeper failed: {e}")
+            await db.rollback()
@@ -12,6 +12,11 @@ class UserRole(str, enum.Enum):
     DOCTOR = "doctor"
     ADMIN = "admin"
 
+# Why a refresh token was revoked (RefreshToken.revoked_reason)
+REVOKED_ROTATED = "rotated"
+REVOKED_LOGOUT = "logout"
+REVOKED_REUSE = "reuse"
+
 class User(Base):
     __tablename__ = "users"
     __table_args__ = {'extend_existing': True}
@@ -25,6 +30,8 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     mfa_secret = Column(String, nullable=True) 
+    # Bumped on role change / deactivation / token theft: access tokens carry it as "ver"
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -67,11 +74,17 @@ class RefreshToken(Base):
     __table_args__ = {'extend_existing': True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    token_hash = Column(String, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # SHA-256 hex digest of the token (never the raw token). Unique: O(1) lookup on rotate.
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Every token issued by rotating one login shares a family; reuse of a
+    # rotated token revokes the whole family.
+    family_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     revoked = Column(Boolean, default=False)
+    # Why it was revoked: only a replayed 'rotated' token means theft
+    revoked_reason = Column(String(16), nullable=True)
     
     user = relationship("User", back_populates="refresh_tokens")
 
@@ -1,7 +1,7 @@
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, delete, func
 from sqlalchemy.orm import selectinload
-from src.modules.auth.models import User, RefreshToken, Profile, DoctorProfile, AuditLog
+from src.modules.auth.models import User, RefreshToken, Profile, DoctorProfile, AuditLog, REVOKED_ROTATED
 
 class AuthRepository:
     def __init__(self, db):
@@ -42,15 +42,80 @@ class AuthRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
 
-    async def store_refresh_token(self, user_id: str, token_hash: str, expires_at):
+    async def get_user_by_id(self, user_id: str):
+        query = select(User).where(User.id == user_id)
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    # --- REFRESH TOKENS (stored as SHA-256 digests) ---
+    async def store_refresh_token(self, user_id: str, token_hash: str, expires_at, family_id):
         refresh_token = RefreshToken(
             user_id=user_id,
             token_hash=token_hash,
+            family_id=family_id,
             expires_at=expires_at
         )
         self.db.add(refresh_token)
         await self.db.commit()
 
+    async def claim_refresh_token(self, token_hash: str):
+        """
+        Atomically marks a live token as used (unique index lookup).
+        Returns (user_id, family_id), or None if it is unknown, expired or already used.
+        Does NOT commit: the caller commits together with the replacement token.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked == False,
+                RefreshToken.expires_at > func.now()
+            )
+            .values(revoked=True, revoked_reason=REVOKED_ROTATED)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.first()
+
+    async def get_refresh_token(self, token_hash: str):
+        query = select(RefreshToken).where(RefreshToken.token_hash == token_hash)
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    async def revoke_refresh_family(self, family_id, reason: str):
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked == False)
+            .values(revoked=True, revoked_reason=reason)
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+
+    async def revoke_user_refresh_tokens(self, user_id: str, reason: str):
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+            .values(revoked=True, revoked_reason=reason)
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+
+    async def purge_expired_refresh_tokens(self, batch_size: int = 1000) -> int:
+        """Delete expired tokens in small batches so we never hold long locks."""
+        total = 0
+        while True:
+            batch = (
+                select(RefreshToken.id)
+                .where(RefreshToken.expires_at < func.now())
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await self.db.execute(delete(RefreshToken).where(RefreshToken.id.in_(batch)))
+            await self.db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
     async def update_profile(self, user_id: str, data: dict):
         """Updates generic profile and doctor profile if applicable."""
         # 1. Update Generic Profile
@@ -71,6 +136,37 @@ class AuthRepository:
 
         await self.db.commit()
 
+    async def update_account(self, user_id: str, data: dict):
+        """
+        Account-level fields (role, is_active) + token version bump in one UPDATE.
+        Returns the new token version, or None if the user doesn't exist.
+        Does NOT commit. Callers must publish the version and invalidate the cached principal.
+        """
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**data, token_version=User.token_version + 1)
+            .returning(User.token_version)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar()
+
+    # --- TOKEN VERSION (source of truth; Redis holds a copy) ---
+    async def get_token_version(self, user_id: str):
+        result = await self.db.execute(select(User.token_version).where(User.id == user_id))
+        return result.scalar()
+
+    async def bump_token_version(self, user_id: str):
+        """Returns the new version (None if the user doesn't exist). Does NOT commit."""
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar()
+
     async def log_action(self, performed_by: str, action: str, target_id: str, details: str):
         log = AuditLog(
             performed_by=performed_by,
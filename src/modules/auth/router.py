@@ -41,10 +41,12 @@ async def refresh_token(refresh_token: str, service: AuthService = Depends(get_s
 
 @router.post("/logout")
 async def logout(
+    refresh_token: str = None,
     current_user = Depends(get_current_user),
     service: AuthService = Depends(get_service)
 ):
-    await service.logout_user(current_user.id)
+    """Revokes the given refresh token's session, or every session without one."""
+    await service.logout_user(current_user.id, refresh_token)
     return {"message": "Logged out successfully"}
 
 @router.get("/test/patient", dependencies=[Depends(require_role("patient"))])
@@ -17,6 +17,13 @@ class UserCreate(BaseModel):
             raise ValueError("Role must be patient, doctor")
         return v
 
+# 1b. Bulk Import Row (CSV column / NDJSON key per field)
+class BulkUserRow(UserCreate):
+    # Only used when role == "doctor"
+    specialization: str = "General Physician"
+    experience_years: int = Field(0, ge=0)
+    consultation_fee: float = Field(0.0, ge=0)
+
 # 2. Input Schema (What the user sends to Login)
 class UserLogin(BaseModel):
     email: EmailStr
@@ -47,6 +54,17 @@ class ProfileUpdate(BaseModel):
     experience_years: Optional[int] = None
     consultation_fee: Optional[float] = None
 
+# Admin-only: account-level changes (revoke outstanding tokens)
+class AccountUpdate(BaseModel):
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    @validator("role")
+    def validate_role(cls, v):
+        if v is not None and v not in ["patient", "doctor", "admin"]:
+            raise ValueError("Role must be patient, doctor or admin")
+        return v
+
 class ProfileResponse(BaseModel):
     id: UUID  # <--- FIXED: Removed 'uuid.' prefix
     email: str
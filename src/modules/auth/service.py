@@ -1,8 +1,13 @@
-from fastapi import HTTPException, status
+from fastapi import HTTPException
 from src.modules.auth.repository import AuthRepository
+from src.modules.auth.models import UserRole, REVOKED_ROTATED, REVOKED_LOGOUT, REVOKED_REUSE
 from src.modules.auth.schemas import UserCreate, UserLogin, TokenResponse, ProfileUpdate
-from src.common.utils import get_password_hash, verify_password, create_access_token, create_refresh_token
+from src.common.utils import create_access_token, create_refresh_token, hash_token, REFRESH_TOKEN_TYPE
+from src.common.password_hasher import password_hasher
 from src.common.config import settings
+from src.common.cache import cache
+from src.modules.doctors.service import DOCTORS_CACHE_NAMESPACE
+from src.modules.auth.dependencies import invalidate_principal, publish_token_version, bump_token_version
 from datetime import timedelta, datetime
 from jose import jwt, JWTError
 import uuid
@@ -16,8 +21,8 @@ class AuthService:
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
 
-        # 2. Hash Password
-        hashed_password = get_password_hash(user_in.password)
+        # 2. Hash Password (bcrypt pool, off the event loop)
+        hashed_password = await password_hasher.hash(user_in.password)
 
         # 3. Prepare User Data (Account)
         # We explicitly exclude profile fields here
@@ -38,7 +43,13 @@ class AuthService:
         }
 
         # 5. Create in DB
-        return await self.repository.create_user(user_data, profile_data, user_in.role)
+        user = await self.repository.create_user(user_data, profile_data, user_in.role)
+
+        # 6. New doctors must show up in search immediately
+        if user_in.role == "doctor":
+            await cache.invalidate_namespace(DOCTORS_CACHE_NAMESPACE)
+
+        return user
 
     async def login_user(self, login_data: UserLogin) -> TokenResponse:
         # 1. Get User
@@ -46,59 +57,106 @@ class AuthService:
         if not user:
             raise HTTPException(status_code=400, detail="Invalid credentials")
 
-        # 2. Verify Password
-        if not verify_password(login_data.password, user.password_hash):
+        # 2. Verify Password (bcrypt pool, off the event loop)
+        if not await password_hasher.verify(login_data.password, user.password_hash):
             raise HTTPException(status_code=400, detail="Invalid credentials")
         
         # 3. Check Active Status
         if not user.is_active:
              raise HTTPException(status_code=400, detail="Inactive user")
 
-        # 4. Generate Tokens
-        access_token = create_access_token(data={"sub": str(user.id), "role": user.role.value})
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
+        # 4. Generate Tokens (a new refresh-token family per login)
+        return await self._issue_tokens(user, family_id=uuid.uuid4())
 
-        # 5. Store Refresh Token
+    async def _issue_tokens(self, user, family_id) -> TokenResponse:
+        # role + ver let role-gated routes skip the user lookup
+        access_token = create_access_token(data={
+            "sub": str(user.id),
+            "role": user.role.value,
+            "ver": await publish_token_version(user.id, user.token_version),
+        })
+        refresh_token = create_refresh_token(data={"sub": str(user.id), "fam": str(family_id)})
+
+        # Only the digest is stored (commits the rotation too, if any)
         await self.repository.store_refresh_token(
-            user.id, 
-            refresh_token, 
-            datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+            user.id,
+            hash_token(refresh_token),
+            datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            family_id
         )
 
         return TokenResponse(access_token=access_token, refresh_token=refresh_token)
 
+    @staticmethod
+    def _decode_refresh_token(refresh_token: str) -> dict:
+        """Signature/expiry, type 'refresh' and well-formed sub/fam claims, or 401."""
+        invalid = HTTPException(status_code=401, detail="Invalid refresh token")
+        try:
+            payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("type") != REFRESH_TOKEN_TYPE:
+                raise invalid
+            uuid.UUID(payload.get("sub") or "")
+            uuid.UUID(payload.get("fam") or "")
+        except (JWTError, ValueError):
+            raise invalid
+        return payload
+
     async def rotate_tokens(self, refresh_token: str) -> TokenResponse:
+        invalid = HTTPException(status_code=401, detail="Invalid refresh token")
+
         # 1. Validate Token Structure
+        payload = self._decode_refresh_token(refresh_token)
+
+        # 2. Claim the token (unique index lookup; marks it used in the same statement)
+        token_hash = hash_token(refresh_token)
+        claimed = await self.repository.claim_refresh_token(token_hash)
+
+        if claimed is None:
+            # 3. Replaying a token that was already rotated: it was stolen
+            # (or the client is broken). Kill the whole family and every access token.
+            # Logged-out or expired tokens are simply rejected.
+            stored = await self.repository.get_refresh_token(token_hash)
+            if stored is not None and stored.revoked_reason == REVOKED_ROTATED:
+                await bump_token_version(self.repository.db, stored.user_id)
+                await self.repository.revoke_refresh_family(stored.family_id, REVOKED_REUSE) # Commits both
+                await self.repository.log_action(
+                    performed_by=stored.user_id,
+                    action="REFRESH_TOKEN_REUSE",
+                    target_id=stored.user_id,
+                    details=f"Token family {stored.family_id} revoked"
+                )
+            raise invalid
+
+        # 4. The signed claims must match the stored row
+        if payload["sub"] != str(claimed.user_id) or payload["fam"] != str(claimed.family_id):
+            await self.repository.db.rollback()
+            raise invalid
+
+        # 5. Re-read role / status: they may have changed since the last login
+        user = await self.repository.get_user_by_id(claimed.user_id)
+        if user is None or not user.is_active:
+            raise invalid
+
+        # 6. Generate New Pair in the same family (commits the claim + new token together)
+        return await self._issue_tokens(user, family_id=claimed.family_id)
+
+    async def logout_user(self, user_id, refresh_token: str = None):
+        """Revokes one session (its refresh-token family) or, without a token, all of them."""
+        if refresh_token is None:
+            await self.repository.revoke_user_refresh_tokens(user_id, REVOKED_LOGOUT)
+            return
+
+        # Someone else's (or an unknown) token must not log this user out everywhere
+        invalid = HTTPException(status_code=400, detail="Invalid refresh token")
         try:
-            payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                raise HTTPException(status_code=401, detail="Invalid refresh token")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid refresh token")
-
-        # 2. Check DB (Is it blacklisted/revoked? Does it match?)
-        # For now, we trust the JWT signature + user existence.
-        # Ideally, we verify against the 'refresh_tokens' table here.
-        
-        # 3. Generate New Pair
-        new_access_token = create_access_token(data={"sub": user_id})
-        new_refresh_token = create_refresh_token(data={"sub": user_id})
-        
-        # 4. Update DB (Rotate)
-        await self.repository.store_refresh_token(
-            uuid.UUID(user_id), 
-            new_refresh_token, 
-            datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        )
-        
-        return TokenResponse(access_token=new_access_token, refresh_token=new_refresh_token)
+            payload = self._decode_refresh_token(refresh_token)
+        except HTTPException:
+            raise invalid
+        stored = await self.repository.get_refresh_token(hash_token(refresh_token))
+        if stored is None or stored.user_id != user_id or payload["fam"] != str(stored.family_id):
+            raise invalid
+        await self.repository.revoke_refresh_family(stored.family_id, REVOKED_LOGOUT)
 
-    async def logout_user(self, user_id: str):
-        # In a real system, you might delete the refresh token from DB
-        # or blacklist the access token in Redis.
-        pass
-    
     # --- PHASE 5 METHODS (Profiles) ---
     async def get_user_profile(self, user_id: str):
         return await self.repository.get_full_user_details(user_id)
@@ -113,5 +171,39 @@ class AuthService:
             target_id=user_id,
             details=str(data)
         )
+
+        # Name / specialization / fee changes are visible in doctor search
+        await cache.invalidate_namespace(DOCTORS_CACHE_NAMESPACE)
+        # The cached principal must never outlive a change to the user
+        await invalidate_principal(user_id)
         
+        return await self.get_user_profile(user_id)
+
+    async def update_account(self, performed_by: str, user_id: str, role: str = None, is_active: bool = None):
+        """Role change / (de)activation. Takes effect on the user's next request."""
+        data = {}
+        if role is not None:
+            data["role"] = UserRole(role)
+        if is_active is not None:
+            data["is_active"] = is_active
+
+        version = await self.repository.update_account(user_id, data) if data else None
+        if version is None:
+            user = await self.get_user_profile(user_id)
+            if user is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            return user
+
+        # Outstanding access tokens carry the old role: revoke them (Redis before the commit)
+        await publish_token_version(user_id, version)
+        await self.repository.log_action(
+            performed_by=performed_by,
+            action="ACCOUNT_UPDATE",
+            target_id=user_id,
+            details=f"role={role} is_active={is_active}"
+        ) # Commits the update too
+        await invalidate_principal(user_id)
+        # Deactivated doctors / role changes affect search results too
+        await cache.invalidate_namespace(DOCTORS_CACHE_NAMESPACE)
+
         return await self.get_user_profile(user_id)
\ No newline at end of file
@@ -1,19 +1,40 @@
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey, Boolean, String
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, DateTime, ForeignKey, Boolean, String, Index, text
+from sqlalchemy.dialects.postgresql import UUID, TSTZRANGE, ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.core.database import Base
 
 class AvailabilitySlot(Base):
     __tablename__ = "availability_slots"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Postgres itself rejects overlapping slots of the same doctor (GiST
+        # index probe, atomic with the INSERT). Needs the btree_gist extension.
+        ExcludeConstraint(
+            ("doctor_id", "="),
+            ("during", "&&"),
+            name="ex_availability_slots_no_overlap",
+            using="gist",
+        ),
+        # A doctor's schedule, windowed and keyset-paginated on (start_time, id)
+        Index("ix_availability_slots_doctor_start_id", "doctor_id", "start_time", "id"),
+        # Open-slot search: walks open slots in (start_time, id) order and
+        # skips booked ones for free (they are not in the index at all).
+        Index(
+            "ix_availability_slots_open_start_id",
+            "start_time", "id",
+            postgresql_where=text("is_booked = false"),
+        ),
+        {'extend_existing': True},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     doctor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     start_time = Column(DateTime(timezone=True), nullable=False, index=True)
     end_time = Column(DateTime(timezone=True), nullable=False)
+    # [start_time, end_time), maintained by Postgres
+    during = Column(TSTZRANGE, Computed("tstzrange(start_time, end_time, '[)')", persisted=True))
     
     is_booked = Column(Boolean, default=False, index=True)
     
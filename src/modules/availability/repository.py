@@ -1,23 +1,23 @@
+import uuid
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
 from src.modules.availability.models import AvailabilitySlot
+from src.modules.auth.models import User, Profile, DoctorProfile
+
+# SQLSTATE raised by the ex_availability_slots_no_overlap EXCLUDE constraint
+EXCLUSION_VIOLATION = "23P01"
+
+# Rows fetched per round trip when streaming slots (server-side cursor)
+STREAM_BATCH_SIZE = 1000
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
 
 class AvailabilityRepository:
     def __init__(self, db):
         self.db = db
 
-    async def check_overlap(self, doctor_id: str, start: str, end: str):
-        """Returns True if there is an overlapping slot."""
-        query = select(AvailabilitySlot).where(
-            and_(
-                AvailabilitySlot.doctor_id == doctor_id,
-                AvailabilitySlot.start_time < end,  # New Start must be before Old End
-                AvailabilitySlot.end_time > start   # New End must be after Old Start
-            )
-        )
-        result = await self.db.execute(query)
-        return result.scalars().first() is not None
-
     async def create_slot(self, doctor_id: str, start: str, end: str):
         slot = AvailabilitySlot(
             doctor_id=doctor_id,
@@ -25,13 +25,99 @@ class AvailabilityRepository:
             end_time=end
         )
         self.db.add(slot)
-        await self.db.commit()
+        try:
+            # Overlaps are rejected by the database (EXCLUDE constraint), atomically
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
         await self.db.refresh(slot)
         return slot
 
-    async def get_doctor_slots(self, doctor_id: str):
-        query = select(AvailabilitySlot).where(
-            AvailabilitySlot.doctor_id == doctor_id
-        ).order_by(AvailabilitySlot.start_time)
+    async def create_slots_bulk(self, doctor_id: str, intervals: list):
+        """One multi-row INSERT ... RETURNING and one COMMIT for the whole batch."""
+        rows = [
+            {"id": uuid.uuid4(), "doctor_id": doctor_id, "start_time": start, "end_time": end,
+             "is_booked": False, "status": "OPEN"}
+            for start, end in intervals
+        ]
+        stmt = insert(AvailabilitySlot).values(rows).returning(AvailabilitySlot)
+        try:
+            result = await self.db.execute(stmt)
+            slots = result.scalars().all()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        return slots
+
+    def _doctor_slots_query(self, doctor_id: str, start=None, end=None):
+        # Plain columns, not ORM entities: nothing lands in the identity map
+        query = select(
+            AvailabilitySlot.id,
+            AvailabilitySlot.doctor_id,
+            AvailabilitySlot.start_time,
+            AvailabilitySlot.end_time,
+            AvailabilitySlot.is_booked,
+            AvailabilitySlot.status,
+        ).where(AvailabilitySlot.doctor_id == doctor_id)
+        if start is not None:
+            query = query.where(AvailabilitySlot.start_time >= start)
+        if end is not None:
+            query = query.where(AvailabilitySlot.start_time < end)
+        return query.order_by(AvailabilitySlot.start_time, AvailabilitySlot.id)
+
+    async def get_doctor_slots(self, doctor_id: str, start=None, end=None,
+                               cursor: tuple = None, limit: int = 100):
+        """One page of a doctor's slots in (start_time, id) order (fetches limit + 1 rows)."""
+        query = self._doctor_slots_query(doctor_id, start, end)
+        if cursor is not None:
+            query = query.where(tuple_(AvailabilitySlot.start_time, AvailabilitySlot.id) > tuple_(*cursor))
+        result = await self.db.execute(query.limit(limit + 1))
+        return result.all()
+
+    async def stream_doctor_slots(self, doctor_id: str, start=None, end=None):
+        """
+        Every matching slot through a server-side cursor, STREAM_BATCH_SIZE rows
+        per round trip. Memory stays flat no matter how long the history is.
+        """
+        query = self._doctor_slots_query(doctor_id, start, end).execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await self.db.stream(query)
+        async for row in result:
+            yield row
+
+    async def search_open_slots(self, after, before=None, specialization: str = None,
+                                cursor: tuple = None, limit: int = 20):
+        """
+        Earliest open slots across all active doctors, ordered by (start_time, id).
+        Served by the partial index ix_availability_slots_open_start_id.
+        Fetches limit + 1 rows so the caller knows whether there is a next page.
+        """
+        query = (
+            select(
+                AvailabilitySlot.id.label("slot_id"),
+                AvailabilitySlot.doctor_id,
+                AvailabilitySlot.start_time,
+                AvailabilitySlot.end_time,
+                Profile.full_name.label("doctor_name"),
+                DoctorProfile.specialization,
+                DoctorProfile.consultation_fee,
+            )
+            .join(User, User.id == AvailabilitySlot.doctor_id)
+            .join(DoctorProfile, DoctorProfile.user_id == AvailabilitySlot.doctor_id)
+            .join(Profile, Profile.user_id == AvailabilitySlot.doctor_id)
+            .where(AvailabilitySlot.is_booked == False) # Matches the partial index predicate
+            .where(AvailabilitySlot.start_time >= after)
+            .where(User.is_active == True)
+        )
+        if before is not None:
+            query = query.where(AvailabilitySlot.start_time < before)
+        if specialization:
+            query = query.where(DoctorProfile.specialization.ilike(f"%{specialization}%"))
+        if cursor is not None:
+            # Row comparison: (start_time, id) > (:start_time, :id)
+            query = query.where(tuple_(AvailabilitySlot.start_time, AvailabilitySlot.id) > tuple_(*cursor))
+
+        query = query.order_by(AvailabilitySlot.start_time, AvailabilitySlot.id).limit(limit + 1)
         result = await self.db.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return result.all()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import get_db
-from src.modules.auth.dependencies import get_current_user, require_role
-from src.modules.availability.schemas import SlotCreate, SlotResponse
+from src.modules.auth.dependencies import require_role
+from src.modules.availability.schemas import SlotCreate, SlotResponse, RecurringSlotTemplate, RecurringSlotsResponse, SlotPage, OpenSlotPage
 from src.modules.availability.service import AvailabilityService
 from src.modules.availability.repository import AvailabilityRepository
 
@@ -22,10 +23,48 @@ async def create_slot(
     """Doctor creates a time slot (e.g., 9:00 - 10:00)."""
     return await service.create_availability_slot(current_user.id, slot_data)
 
-@router.get("/slots", response_model=List[SlotResponse])
+@router.post("/slots/recurring", response_model=RecurringSlotsResponse)
+async def create_recurring_slots(
+    template: RecurringSlotTemplate,
+    current_user = Depends(require_role("doctor")),
+    service: AvailabilityService = Depends(get_service)
+):
+    """Doctor creates a weekly schedule (e.g., Mon-Fri 9:00-17:00, 15 min slots, 12 weeks) in one go."""
+    return await service.create_recurring_slots(current_user.id, template)
+
+@router.get("/slots", response_model=SlotPage)
 async def get_my_slots(
+    start: datetime = Query(None, alias="from", description="Earliest start (inclusive)"),
+    end: datetime = Query(None, alias="to", description="Latest start (exclusive)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500, description="Items per page (Max 500)"),
+    current_user = Depends(require_role("doctor")),
+    service: AvailabilityService = Depends(get_service)
+):
+    """Doctor sees their own schedule, one page at a time (next page: ?cursor=next_cursor)."""
+    slots, next_cursor = await service.list_slots(current_user.id, start, end, cursor, limit)
+    return {"data": slots, "next_cursor": next_cursor}
+
+@router.get("/slots/export")
+async def export_my_slots(
+    start: datetime = Query(None, alias="from", description="Earliest start (inclusive)"),
+    end: datetime = Query(None, alias="to", description="Latest start (exclusive)"),
     current_user = Depends(require_role("doctor")),
+):
+    """Doctor's full schedule as NDJSON (one slot per line), streamed for calendar sync."""
+    return StreamingResponse(
+        AvailabilityService.export_slots(current_user.id, start, end),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/open", response_model=OpenSlotPage)
+async def search_open_slots(
+    spec: str = Query(None, description="Filter by Specialization"),
+    after: datetime = Query(None, description="Earliest start (default: now)"),
+    before: datetime = Query(None, description="Latest start (exclusive)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=50, description="Items per page (Max 50)"),
     service: AvailabilityService = Depends(get_service)
 ):
-    """Doctor sees their own schedule."""
-    return await service.list_slots(current_user.id)
\ No newline at end of file
+    """Public: earliest open slots across all doctors (keyset pagination)."""
+    return await service.search_open_slots(spec, after, before, cursor, limit)
@@ -1,7 +1,12 @@
-from pydantic import BaseModel, validator
-from datetime import datetime
-from typing import List
+from pydantic import BaseModel, Field, validator
+from datetime import date, datetime, time
+from typing import List, Optional
 from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Upper bound on slots generated by one template (one INSERT, one transaction).
+# 6 bind params per row keeps the INSERT under Postgres' 32767 parameter limit.
+MAX_SLOTS_PER_TEMPLATE = 5000
 
 class SlotCreate(BaseModel):
     start_time: datetime
@@ -13,6 +18,36 @@ class SlotCreate(BaseModel):
             raise ValueError("End time must be after start time")
         return v
 
+class RecurringSlotTemplate(BaseModel):
+    """e.g. Mon-Fri 09:00-17:00 in 15-minute slots for 12 weeks."""
+    weekdays: List[int] = Field(..., min_length=1, description="0 = Monday ... 6 = Sunday")
+    day_start: time
+    day_end: time
+    slot_minutes: int = Field(..., ge=5, le=480)
+    start_date: date
+    weeks: int = Field(..., ge=1, le=52)
+    timezone: str = "UTC" # Wall-clock times are interpreted here (DST-aware)
+
+    @validator("weekdays")
+    def check_weekdays(cls, v):
+        if any(day < 0 or day > 6 for day in v):
+            raise ValueError("Weekdays must be between 0 (Monday) and 6 (Sunday)")
+        return sorted(set(v))
+
+    @validator("day_end")
+    def check_day_order(cls, v, values):
+        if "day_start" in values and v <= values["day_start"]:
+            raise ValueError("day_end must be after day_start")
+        return v
+
+    @validator("timezone")
+    def check_timezone(cls, v):
+        try:
+            ZoneInfo(v)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone '{v}'")
+        return v
+
 class SlotResponse(BaseModel):
     id: UUID
     doctor_id: UUID
@@ -22,4 +57,25 @@ class SlotResponse(BaseModel):
     status: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RecurringSlotsResponse(BaseModel):
+    created: int
+    slots: List[SlotResponse]
+
+class OpenSlotResponse(BaseModel):
+    slot_id: UUID
+    doctor_id: UUID
+    doctor_name: str
+    specialization: str
+    consultation_fee: float
+    start_time: datetime
+    end_time: datetime
+
+class SlotPage(BaseModel):
+    data: List[SlotResponse]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page
+
+class OpenSlotPage(BaseModel):
+    data: List[OpenSlotResponse]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page
@@ -1,23 +1,114 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from fastapi import HTTPException
-from src.modules.availability.repository import AvailabilityRepository
-from src.modules.availability.schemas import SlotCreate
+from sqlalchemy.exc import IntegrityError
+from src.modules.availability.repository import AvailabilityRepository, is_overlap_violation
+from src.modules.availability.schemas import SlotCreate, SlotResponse, RecurringSlotTemplate, MAX_SLOTS_PER_TEMPLATE
+from src.core.database import AsyncSessionLocal
+from src.common.pagination import decode_cursor, keyset_page, as_utc
+
+def expand_template(template: RecurringSlotTemplate):
+    """Turns a weekly template into sorted (start, end) UTC intervals."""
+    tz = ZoneInfo(template.timezone)
+    step = timedelta(minutes=template.slot_minutes)
+    intervals = []
+    for day_offset in range(template.weeks * 7):
+        day = template.start_date + timedelta(days=day_offset)
+        if day.weekday() not in template.weekdays:
+            continue
+        # Walk in wall-clock time so 09:00 stays 09:00 across DST changes
+        start = datetime.combine(day, template.day_start)
+        day_end = datetime.combine(day, template.day_end)
+        while start + step <= day_end:
+            wall_start, start = start, start + step
+            slot_start = wall_start.replace(tzinfo=tz).astimezone(timezone.utc)
+            slot_end = start.replace(tzinfo=tz).astimezone(timezone.utc)
+            # Skip slots the clock change breaks: a start inside the spring-forward
+            # gap (doesn't exist), or a real length that isn't slot_minutes
+            if slot_start.astimezone(tz).replace(tzinfo=None) != wall_start:
+                continue
+            if slot_end - slot_start != step:
+                continue
+            intervals.append((slot_start, slot_end))
+    intervals.sort()
+    return intervals
 
 class AvailabilityService:
     def __init__(self, repository: AvailabilityRepository):
         self.repository = repository
 
     async def create_availability_slot(self, user_id: str, slot_data: SlotCreate):
-        # 1. Check for Overlap
-        has_overlap = await self.repository.check_overlap(
-            user_id, slot_data.start_time, slot_data.end_time
-        )
-        if has_overlap:
-            raise HTTPException(status_code=400, detail="Time slot overlaps with an existing slot")
-
-        # 2. Create
-        return await self.repository.create_slot(
-            user_id, slot_data.start_time, slot_data.end_time
-        )
-
-    async def list_slots(self, doctor_id: str):
-        return await self.repository.get_doctor_slots(doctor_id)
\ No newline at end of file
+        # Create. No pre-check: Postgres rejects overlaps atomically (EXCLUDE constraint)
+        try:
+            return await self.repository.create_slot(
+                user_id, slot_data.start_time, slot_data.end_time
+            )
+        except IntegrityError as e:
+            if is_overlap_violation(e):
+                raise HTTPException(status_code=400, detail="Time slot overlaps with an existing slot")
+            raise
+
+    async def create_recurring_slots(self, user_id: str, template: RecurringSlotTemplate):
+        # 1. Expand server-side
+        intervals = expand_template(template)
+        if not intervals:
+            raise HTTPException(status_code=400, detail="Template produces no slots")
+        if len(intervals) > MAX_SLOTS_PER_TEMPLATE:
+            raise HTTPException(status_code=400, detail=f"Template produces more than {MAX_SLOTS_PER_TEMPLATE} slots")
+
+        # 2. Overlaps inside the batch (only possible around a DST fall-back)
+        for (_, previous_end), (start, _) in zip(intervals, intervals[1:]):
+            if start < previous_end:
+                raise HTTPException(status_code=400, detail=f"Template produces overlapping slots at {start.isoformat()}")
+
+        # 3. Create (ONE statement, ONE transaction). Overlaps with existing
+        # slots are rejected by the EXCLUDE constraint: all or nothing.
+        try:
+            slots = await self.repository.create_slots_bulk(user_id, intervals)
+        except IntegrityError as e:
+            if is_overlap_violation(e):
+                raise HTTPException(status_code=400, detail="Template overlaps with an existing slot")
+            raise
+        return {"created": len(slots), "slots": slots}
+
+    async def list_slots(self, doctor_id: str, start: datetime = None, end: datetime = None,
+                         cursor: str = None, limit: int = 100):
+        """Returns (slots, next_cursor)."""
+        start, end = as_utc(start), as_utc(end)
+        position = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) if cursor else None
+        rows = await self.repository.get_doctor_slots(doctor_id, start, end, position, limit)
+        return keyset_page(rows, limit, key=lambda row: (row.start_time, row.id))
+
+    @staticmethod
+    async def export_slots(doctor_id: str, start: datetime = None, end: datetime = None):
+        """
+        NDJSON lines for every matching slot. Opens its own session: the stream
+        outlives the request handler, so it can't borrow the request's session.
+        """
+        start, end = as_utc(start), as_utc(end)
+        async with AsyncSessionLocal() as session:
+            async for row in AvailabilityRepository(session).stream_doctor_slots(doctor_id, start, end):
+                yield SlotResponse.model_validate(row).model_dump_json() + "\n"
+
+    async def search_open_slots(self, specialization: str = None, after: datetime = None,
+                                before: datetime = None, cursor: str = None, limit: int = 20):
+        # 1. Window: never in the past (naive bounds are UTC, so they compare with now)
+        now = datetime.now(timezone.utc)
+        after, before = as_utc(after), as_utc(before)
+        after = max(after, now) if after is not None else now
+
+        # 2. Resume after the last row of the previous page
+        position = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) if cursor else None
+
+        # 3. Fetch one page (+1 row to detect the next page)
+        rows = await self.repository.search_open_slots(after, before, specialization, position, limit)
+        page, next_cursor = keyset_page(rows, limit, key=lambda row: (row.start_time, row.slot_id))
+
+        return {
+            "data": [
+                {**row._mapping, "consultation_fee": float(row.consultation_fee or 0)}
+                for row in page
+            ],
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,103 @@
+import uuid
+from redis.exceptions import RedisError
+from src.common.cache import cache
+from src.common.config import settings
+from src.core.logger import setup_logger
+from src.core.metrics import SLOT_HOLDS
+
+logger = setup_logger("slot_holds")
+
+# Returned by acquire() when Redis is unavailable: the caller proceeds without a hold
+NO_HOLD = ""
+
+BOOKED = "booked"
+
+# Only the owner may drop or convert its hold (it may have expired and been re-taken)
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_MARK_BOOKED_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+end
+return 0
+"""
+
+class SlotHolds:
+    """
+    Short Redis leases in front of the booking transaction.
+    'slot_hold:<slot_id>' = <token> while one request books the slot (SET NX PX),
+    then 'booked' for a few seconds so a flash crowd is turned away in Redis.
+
+    A hold is only an admission filter: Postgres still decides who gets the slot.
+    So an expired hold (crashed worker, slow transaction) can at worst let a second
+    request reach the database, where it gets a normal 409. Never a double booking.
+    """
+    def __init__(self, client):
+        self.redis = client
+        self._release = client.register_script(_RELEASE_SCRIPT)
+        self._mark_booked = client.register_script(_MARK_BOOKED_SCRIPT)
+
+    @staticmethod
+    def _key(slot_id) -> str:
+        return f"slot_hold:{slot_id}"
+
+    async def acquire(self, slot_id):
+        """
+        Returns (token, None) for the winner, (None, holder) for everyone else,
+        where holder is 'booked' or the remaining hold in ms.
+        Fails open (NO_HOLD) if Redis is down: the database still guards the slot.
+        """
+        token = str(uuid.uuid4())
+        key = self._key(slot_id)
+        try:
+            if await self.redis.set(key, token, nx=True, px=settings.SLOT_HOLD_TTL_MS):
+                SLOT_HOLDS.labels("acquired").inc()
+                return token, None
+            async with self.redis.pipeline(transaction=False) as pipe:
+                holder, remaining_ms = await pipe.get(key).pttl(key).execute()
+        except RedisError as e:
+            logger.warning(f"⚠️ Slot hold unavailable for {slot_id}, going straight to the DB: {e}")
+            SLOT_HOLDS.labels("bypassed").inc()
+            return NO_HOLD, None
+
+        if holder is None:
+            # Expired between SET and GET: let the client retry immediately
+            remaining_ms = 0
+        SLOT_HOLDS.labels("rejected").inc()
+        return None, BOOKED if holder == BOOKED else max(remaining_ms, 0)
+
+    async def mark_booked(self, slot_id, token: str):
+        """Turns our hold into a short 'booked' marker (only if we still own it)."""
+        if token == NO_HOLD or settings.SLOT_HOLD_BOOKED_TTL_MS <= 0:
+            return await self.release(slot_id, token)
+        try:
+            await self._mark_booked(keys=[self._key(slot_id)], args=[token, BOOKED, settings.SLOT_HOLD_BOOKED_TTL_MS])
+        except RedisError as e:
+            logger.warning(f"⚠️ Could not mark slot {slot_id} as booked: {e}")
+
+    async def release(self, slot_id, token: str):
+        """Drops our hold (only if we still own it)."""
+        if token == NO_HOLD:
+            return
+        try:
+            await self._release(keys=[self._key(slot_id)], args=[token])
+        except RedisError as e:
+            # Harmless: the hold expires on its own after SLOT_HOLD_TTL_MS
+            logger.warning(f"⚠️ Could not release hold on slot {slot_id}: {e}")
+
+    async def clear(self, *slot_ids):
+        """Reconcile after a slot is reopened (payment failure, timeout): drop any marker."""
+        if not slot_ids:
+            return
+        try:
+            await self.redis.delete(*[self._key(slot_id) for slot_id in slot_ids])
+        except RedisError as e:
+            logger.warning(f"⚠️ Could not clear holds for reopened slots: {e}")
+
+# Global Instance (shares the cache's text client)
+slot_holds = SlotHolds(cache.redis)
@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -14,7 +14,25 @@ class BookingStatus(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Booking history (GET /bookings/): newest first per patient / doctor,
+        # keyset on (created_at, id). INCLUDE lets the scan filter on status
+        # and reach the slot without visiting the heap.
+        Index(
+            "ix_bookings_patient_created_id", "patient_id", "created_at", "id",
+            postgresql_include=["status", "slot_id"],
+        ),
+        Index(
+            "ix_bookings_doctor_created_id", "doctor_id", "created_at", "id",
+            postgresql_include=["status", "slot_id"],
+        ),
+        # Stale booking janitor: only PENDING rows, oldest first
+        Index(
+            "ix_bookings_pending_created_at", "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+        {'extend_existing': True},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -37,14 +55,33 @@ class Booking(Base):
     doctor = relationship("User", foreign_keys=[doctor_id])
     slot = relationship("AvailabilitySlot")
 
+class BookingSlot(Base):
+    """
+    Every slot held by a multi-slot booking (longer consultations).
+    Booking.slot_id stays the first slot; single-slot bookings have no rows here.
+    """
+    __tablename__ = "booking_slots"
+    __table_args__ = {'extend_existing': True}
+
+    booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id", ondelete="CASCADE"), primary_key=True)
+    slot_id = Column(UUID(as_uuid=True), ForeignKey("availability_slots.id"), primary_key=True, index=True)
+
 class IdempotencyKey(Base):
     """
     Prevents duplicate requests. 
     If a user clicks 'Pay' twice, we check this table.
+    Backend for src/common/idempotency.py when IDEMPOTENCY_BACKEND=database.
     """
     __tablename__ = "idempotency_keys"
     __table_args__ = {'extend_existing': True}
 
     key = Column(String, primary_key=True, index=True)
     response_json = Column(JSON, nullable=True) # Store the success response to replay it
+
+    # In-flight lease: only the holder of lock_token may complete/release the key
+    lock_token = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    # TTL: rows past this are treated as absent and purged in batches
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -1,7 +1,9 @@
+import uuid
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy.exc import IntegrityError
-from src.modules.bookings.models import Booking, IdempotencyKey, BookingStatus
+from sqlalchemy import update, insert, literal, cast, tuple_, or_, func, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array
+from sqlalchemy.orm import selectinload, aliased
+from src.modules.bookings.models import Booking, BookingSlot, BookingStatus
 from src.modules.availability.models import AvailabilitySlot
 from src.modules.auth.models import AuditLog  # <--- CRITICAL IMPORT
 
@@ -9,26 +11,6 @@ class BookingRepository:
     def __init__(self, db):
         self.db = db
 
-    async def get_idempotency_key(self, key: str):
-        query = select(IdempotencyKey).where(IdempotencyKey.key == key)
-        result = await self.db.execute(query)
-        return result.scalars().first()
-
-    async def create_idempotency_key(self, key: str):
-        record = IdempotencyKey(key=key)
-        self.db.add(record)
-        try:
-            await self.db.flush()
-        except IntegrityError:
-            return None 
-        return record
-
-    async def save_idempotency_response(self, key: str, data: dict):
-        record = await self.get_idempotency_key(key)
-        if record:
-            record.response_json = data
-            await self.db.commit()
-
     async def get_slot_with_lock(self, slot_id: str):
         query = select(AvailabilitySlot).where(AvailabilitySlot.id == slot_id).with_for_update()
         result = await self.db.execute(query)
@@ -54,4 +36,248 @@ class BookingRepository:
             details=details
         )
         self.db.add(log)
-        # Note: No await db.commit() here, because it runs inside the main transaction
\ No newline at end of file
+        # Note: No await db.commit() here, because it runs inside the main transaction
+
+    # --- OPTIMISTIC ENGINE (one statement) ---
+    async def claim_and_book(self, patient_id: str, slot_id: str, details: str):
+        """
+        Claims the slot, inserts the booking and the audit row in ONE statement:
+
+            WITH claimed AS (UPDATE availability_slots ... WHERE is_booked = false RETURNING ...),
+                 booking AS (INSERT INTO bookings SELECT ... FROM claimed RETURNING ...),
+                 audit   AS (INSERT INTO audit_logs SELECT ... FROM booking)
+            SELECT * FROM booking
+
+        The conditional UPDATE is the concurrency control: of N racing requests
+        exactly one matches `is_booked = false`, the rest get zero rows.
+        Returns the booking row, or None if the slot is missing or taken.
+        Does not commit.
+        """
+        claimed = (
+            update(AvailabilitySlot)
+            .where(AvailabilitySlot.id == slot_id, AvailabilitySlot.is_booked == False)
+            .values(is_booked=True, status="BOOKED")
+            .returning(AvailabilitySlot.id, AvailabilitySlot.doctor_id)
+            .cte("claimed")
+        )
+        booking = (
+            insert(Booking)
+            .from_select(
+                ["id", "patient_id", "doctor_id", "slot_id", "status"],
+                select(
+                    literal(uuid.uuid4(), Booking.id.type),
+                    literal(patient_id, Booking.patient_id.type),
+                    claimed.c.doctor_id,
+                    claimed.c.id,
+                    # Explicit cast: a bare parameter would arrive as text, not the enum type
+                    cast(literal(BookingStatus.PENDING, Booking.status.type), Booking.status.type),
+                ),
+            )
+            .returning(Booking.id, Booking.slot_id, Booking.status, Booking.patient_id, Booking.created_at)
+            .cte("booking")
+        )
+        audit = (
+            insert(AuditLog)
+            .from_select(
+                ["id", "action", "performed_by", "target_id", "details"],
+                select(
+                    literal(uuid.uuid4(), AuditLog.id.type),
+                    literal("BOOKING_CREATED"),
+                    literal(patient_id, AuditLog.performed_by.type),
+                    booking.c.id,
+                    literal(details),
+                ),
+            )
+            .cte("audit")
+        )
+        # add_cte: the audit INSERT runs even though nothing selects from it
+        query = select(booking).add_cte(audit)
+        result = await self.db.execute(query)
+        return result.first()
+
+    async def slot_exists(self, slot_id: str) -> bool:
+        result = await self.db.execute(select(AvailabilitySlot.id).where(AvailabilitySlot.id == slot_id))
+        return result.first() is not None
+
+    # --- MULTI-SLOT ---
+    async def lock_slots(self, slot_ids: list):
+        """
+        Row-locks every requested slot in ONE statement, always in id order.
+        Two requests with overlapping slots therefore lock in the same order:
+        the second waits for the first instead of deadlocking with it.
+        """
+        query = (
+            select(
+                AvailabilitySlot.id,
+                AvailabilitySlot.doctor_id,
+                AvailabilitySlot.start_time,
+                AvailabilitySlot.end_time,
+                AvailabilitySlot.is_booked,
+            )
+            .where(AvailabilitySlot.id.in_(slot_ids))
+            .order_by(AvailabilitySlot.id)
+            .with_for_update()
+        )
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def book_locked_slots(self, patient_id: str, doctor_id, slot_ids: list, details: str):
+        """
+        Marks the (already locked) slots booked and inserts the booking, its
+        booking_slots rows and the audit row in ONE statement. slot_ids[0]
+        becomes Booking.slot_id. Does not commit.
+        """
+        booking_id = uuid.uuid4()
+        claimed = (
+            update(AvailabilitySlot)
+            .where(AvailabilitySlot.id.in_(slot_ids))
+            .values(is_booked=True, status="BOOKED")
+            .returning(AvailabilitySlot.id)
+            .cte("claimed")
+        )
+        booking = (
+            insert(Booking)
+            .values(
+                id=booking_id,
+                patient_id=patient_id,
+                doctor_id=doctor_id,
+                slot_id=slot_ids[0],
+                status=BookingStatus.PENDING,
+            )
+            .returning(Booking.id, Booking.slot_id, Booking.status, Booking.patient_id, Booking.created_at)
+            .cte("booking")
+        )
+        links = (
+            insert(BookingSlot)
+            .from_select(["booking_id", "slot_id"], select(literal(booking_id, BookingSlot.booking_id.type), claimed.c.id))
+            .cte("links")
+        )
+        audit = (
+            insert(AuditLog)
+            .values(performed_by=patient_id, action="BOOKING_CREATED", target_id=booking_id, details=details)
+            .cte("audit")
+        )
+        query = select(booking).add_cte(links, audit)
+        result = await self.db.execute(query)
+        return result.first()
+
+    async def release_booking_slots(self, booking) -> list:
+        """
+        Reopens every slot of a booking: its primary slot plus any booking_slots
+        rows, in ONE statement. Returns the released slot ids. Does not commit.
+        """
+        linked = select(BookingSlot.slot_id).where(BookingSlot.booking_id == booking.id)
+        stmt = (
+            update(AvailabilitySlot)
+            .where(or_(AvailabilitySlot.id == booking.slot_id, AvailabilitySlot.id.in_(linked)))
+            .values(is_booked=False, status="OPEN")
+            .returning(AvailabilitySlot.id)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars())
+
+    # --- JANITOR ---
+    async def cancel_stale_chunk(self, threshold, batch_size: int):
+        """
+        Cancels up to batch_size PENDING bookings created before threshold with
+        three set-based statements: UPDATE bookings ... RETURNING, one slot
+        release for all of them (multi-slot bookings included), one multi-row
+        audit INSERT. SKIP LOCKED: bookings a payment webhook holds (it locks the
+        booking FOR UPDATE) are left for the next run, and the webhook leaves
+        alone a booking that is no longer PENDING. Returns (cancelled rows,
+        released slot ids). Does not commit.
+        """
+        # 1. Cancel (oldest first, served by ix_bookings_pending_created_at)
+        stale = (
+            select(Booking.id)
+            .where(Booking.status == BookingStatus.PENDING, Booking.created_at < threshold)
+            .order_by(Booking.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(Booking)
+            .where(Booking.id.in_(stale.scalar_subquery()))
+            .values(status=BookingStatus.CANCELLED)
+            .returning(Booking.id, Booking.patient_id, Booking.slot_id)
+        )
+        cancelled = result.all()
+        if not cancelled:
+            return [], []
+
+        # 2. Release every slot of those bookings
+        booking_ids = [row.id for row in cancelled]
+        linked = select(BookingSlot.slot_id).where(BookingSlot.booking_id.in_(booking_ids))
+        result = await self.db.execute(
+            update(AvailabilitySlot)
+            .where(or_(
+                AvailabilitySlot.id.in_([row.slot_id for row in cancelled]),
+                AvailabilitySlot.id.in_(linked),
+            ))
+            .values(is_booked=False, status="OPEN")
+            .returning(AvailabilitySlot.id)
+        )
+        released = list(result.scalars())
+
+        # 3. Audit (one multi-row INSERT)
+        await self.db.execute(insert(AuditLog), [
+            {
+                "id": uuid.uuid4(),
+                "action": "AUTO_TIMEOUT",
+                "performed_by": row.patient_id,
+                "target_id": row.id,
+                "details": "Payment timeout. Slot released.",
+            }
+            for row in cancelled
+        ])
+        return cancelled, released
+
+    # --- HISTORY ---
+    async def list_bookings(self, owner_column, owner_id, status: BookingStatus = None,
+                            start=None, end=None, cursor: tuple = None, limit: int = 20):
+        """
+        One page of bookings for a patient or doctor (owner_column), newest first,
+        keyset on (created_at, id). Plain rows from one query: no ORM objects.
+        Fetches limit + 1 rows so the caller knows whether there is a next page.
+        """
+        # Multi-slot bookings: every linked slot (PK lookup per returned row).
+        # An aggregate always yields one row: NULLs for single-slot bookings.
+        linked = aliased(AvailabilitySlot)
+        extra = (
+            select(
+                func.max(linked.end_time).label("end_time"),
+                func.array_agg(aggregate_order_by(BookingSlot.slot_id, linked.start_time)).label("slot_ids"),
+            )
+            .join(linked, linked.id == BookingSlot.slot_id)
+            .where(BookingSlot.booking_id == Booking.id)
+            .lateral("extra")
+        )
+        query = (
+            select(
+                Booking.id,
+                Booking.slot_id,
+                Booking.status,
+                Booking.patient_id,
+                Booking.doctor_id,
+                Booking.created_at,
+                AvailabilitySlot.start_time,
+                func.coalesce(extra.c.end_time, AvailabilitySlot.end_time).label("end_time"),
+                func.coalesce(extra.c.slot_ids, array([Booking.slot_id])).label("slot_ids"),
+            )
+            .join(AvailabilitySlot, AvailabilitySlot.id == Booking.slot_id)
+            .join(extra, true())
+            .where(owner_column == owner_id)
+        )
+        if status is not None:
+            query = query.where(Booking.status == status)
+        if start is not None:
+            query = query.where(Booking.created_at >= start)
+        if end is not None:
+            query = query.where(Booking.created_at < end)
+        if cursor is not None:
+            # Newest first: the next page is everything strictly older
+            query = query.where(tuple_(Booking.created_at, Booking.id) < tuple_(*cursor))
+
+        query = query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(limit + 1)
+        result = await self.db.execute(query)
+        return result.all()
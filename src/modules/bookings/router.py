@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Header
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import get_db
-from src.modules.auth.dependencies import require_role
-from src.modules.bookings.schemas import BookingCreate, BookingResponse
+from src.modules.auth.dependencies import get_current_user, require_role
+from src.modules.bookings.models import BookingStatus
+from src.modules.bookings.schemas import BookingCreate, BookingResponse, BookingHistoryPage, MultiBookingCreate, MultiBookingResponse
 from src.modules.bookings.service import BookingService
 from src.modules.bookings.repository import BookingRepository
 
@@ -23,17 +25,39 @@ async def create_booking(
     Transactional Booking.
     Locks the slot -> Checks Availability -> Books it.
     """
-    result = await service.book_slot(
+    # Repeated keys never reach this handler: IdempotencyMiddleware replays them
+    return await service.book_slot(
         idempotency_key, 
         current_user.id, 
         booking_data.slot_id
     )
-    
-    # Handle the dictionary return from idempotency check vs object return
-    if isinstance(result, dict):
-        # Convert dict back to object for Pydantic response if needed, 
-        # or we can rely on Pydantic to parse dicts too.
-        # Ideally, we should fetch the booking object again, but for now:
-        return result
-        
-    return result
\ No newline at end of file
+
+@router.post("/multi", response_model=MultiBookingResponse)
+async def create_multi_slot_booking(
+    booking_data: MultiBookingCreate,
+    idempotency_key: str = Header(..., description="Unique key for this request"),
+    current_user = Depends(require_role("patient")),
+    service: BookingService = Depends(get_service)
+):
+    """
+    Longer consultation: consecutive slots of one doctor, one booking.
+    Every slot is booked or none is.
+    """
+    return await service.book_slots(
+        idempotency_key,
+        current_user.id,
+        booking_data.slot_ids
+    )
+
+@router.get("/", response_model=BookingHistoryPage)
+async def list_my_bookings(
+    status: BookingStatus = Query(None, description="Filter by booking status"),
+    start: datetime = Query(None, alias="from", description="Booked at or after"),
+    end: datetime = Query(None, alias="to", description="Booked before"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page (Max 100)"),
+    current_user = Depends(get_current_user),
+    service: BookingService = Depends(get_service)
+):
+    """The caller's bookings (as patient or doctor), newest first, with slot times."""
+    return await service.list_bookings(current_user, status, start, end, cursor, limit)
@@ -1,10 +1,24 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from uuid import UUID
 from datetime import datetime
+from typing import List, Optional
 
 class BookingCreate(BaseModel):
     slot_id: UUID
 
+# Upper bound on slots in one booking (e.g. 8 x 15 min = a 2 hour consultation)
+MAX_SLOTS_PER_BOOKING = 8
+
+class MultiBookingCreate(BaseModel):
+    """Consecutive slots of one doctor, booked all-or-nothing."""
+    slot_ids: List[UUID] = Field(..., min_length=2, max_length=MAX_SLOTS_PER_BOOKING)
+
+    @validator("slot_ids")
+    def check_unique(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError("Duplicate slot ids")
+        return v
+
 class BookingResponse(BaseModel):
     id: UUID
     slot_id: UUID
@@ -13,4 +27,27 @@ class BookingResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MultiBookingResponse(BookingResponse):
+    slot_ids: List[UUID]
+    start_time: datetime
+    end_time: datetime
+
+class BookingHistoryItem(BaseModel):
+    id: UUID
+    slot_id: UUID
+    status: str
+    patient_id: UUID
+    doctor_id: UUID
+    created_at: datetime
+    start_time: datetime
+    end_time: datetime # Of the last slot, for multi-slot bookings
+    slot_ids: List[UUID] # In time order; just [slot_id] for a single-slot booking
+
+    class Config:
+        from_attributes = True
+
+class BookingHistoryPage(BaseModel):
+    data: List[BookingHistoryItem]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page
@@ -1,23 +1,96 @@
+import math
+import uuid
+from datetime import datetime
 from fastapi import HTTPException
+from src.common.config import settings
+from src.core.metrics import BOOKING_ATTEMPTS
+from src.common.pagination import decode_cursor, keyset_page, as_utc
+from src.modules.auth.models import UserRole
+from src.modules.bookings.models import Booking, BookingStatus
 from src.modules.bookings.repository import BookingRepository
+from src.modules.bookings.holds import slot_holds, BOOKED
+
+BOOKING_ENGINES = ("pessimistic", "optimistic")
 
 class BookingService:
-    def __init__(self, repository: BookingRepository):
+    def __init__(self, repository: BookingRepository, engine: str = None):
         self.repository = repository
         self.db = repository.db 
+        self.engine = engine or settings.BOOKING_ENGINE
+        if self.engine not in BOOKING_ENGINES:
+            raise ValueError(f"Unknown booking engine '{self.engine}' (use {' or '.join(BOOKING_ENGINES)})")
 
     async def book_slot(self, idempotency_key: str, patient_id: str, slot_id: str):
-        # 1. Check Idempotency 
-        existing_key = await self.repository.get_idempotency_key(idempotency_key)
-        if existing_key and existing_key.response_json:
-            return existing_key.response_json 
+        # NOTE: Idempotency is handled once, before we get here, by IdempotencyMiddleware
+        # (single claim round trip; replays the stored response for repeated keys).
+        book = self._book_optimistic if self.engine == "optimistic" else self._book_pessimistic
+        hold = None
+        try:
+            # 1. Admission: one Redis command, losers never reach Postgres
+            if settings.SLOT_HOLDS_ENABLED:
+                hold = await self._acquire_hold(slot_id)
+
+            # 2. Book (the database is still the source of truth)
+            booking = await book(idempotency_key, patient_id, slot_id)
+        except HTTPException as e:
+            BOOKING_ATTEMPTS.labels(self.engine, "conflict" if e.status_code == 409 else "rejected").inc()
+            if hold is not None:
+                await slot_holds.release(slot_id, hold)
+            raise
+        except Exception:
+            BOOKING_ATTEMPTS.labels(self.engine, "error").inc()
+            if hold is not None:
+                await slot_holds.release(slot_id, hold)
+            raise
+
+        # 3. Keep turning the crowd away for a few seconds
+        if hold is not None:
+            await slot_holds.mark_booked(slot_id, hold)
+        BOOKING_ATTEMPTS.labels(self.engine, "booked").inc()
+        return booking
+
+    @staticmethod
+    async def _acquire_hold(slot_id: str) -> str:
+        token, holder = await slot_holds.acquire(slot_id)
+        if token is not None:
+            return token
+        if holder == BOOKED:
+            raise HTTPException(status_code=409, detail="Slot already booked")
+        raise HTTPException(
+            status_code=409,
+            detail="Slot is being booked by another patient",
+            headers={"Retry-After": str(max(1, math.ceil(holder / 1000)))},
+        )
+
+    async def _book_optimistic(self, idempotency_key: str, patient_id: str, slot_id: str):
+        """
+        One statement (conditional UPDATE + 2 INSERTs in a CTE) and a COMMIT.
+        The slot's row lock lives only between the two: no Python in between.
+        """
+        try:
+            # 1. Claim + Book + Audit
+            booking = await self.repository.claim_and_book(
+                patient_id, slot_id, details=f"Booked slot {slot_id} via key {idempotency_key}"
+            )
+            if booking is None:
+                await self.db.rollback()
+                # 2. Failure path only: tell "missing" from "taken"
+                if not await self.repository.slot_exists(slot_id):
+                    raise HTTPException(status_code=404, detail="Slot not found")
+                raise HTTPException(status_code=409, detail="Slot already booked")
+
+            # 3. Commit
+            await self.db.commit()
+            return booking
 
-        # 2. Register key
-        if not existing_key:
-            await self.repository.create_idempotency_key(idempotency_key)
+        except Exception:
+            await self.db.rollback()
+            raise
 
+    async def _book_pessimistic(self, idempotency_key: str, patient_id: str, slot_id: str):
+        """SELECT ... FOR UPDATE, then book in the same transaction."""
         try:
-            # 3. Start Transaction & LOCK the slot
+            # 1. Start Transaction & LOCK the slot
             slot = await self.repository.get_slot_with_lock(slot_id)
             
             if not slot:
@@ -26,18 +99,18 @@ class BookingService:
             if slot.is_booked:
                 raise HTTPException(status_code=409, detail="Slot already booked")
 
-            # 4. Update Slot Status
+            # 2. Update Slot Status
             slot.is_booked = True
             slot.status = "BOOKED"
 
-            # 5. Create Booking Record
+            # 3. Create Booking Record
             booking = await self.repository.create_booking(
                 patient_id=patient_id,
                 doctor_id=slot.doctor_id, 
                 slot_id=slot_id
             )
 
-            # --- 6.5 NEW: LOG THE ACTION ---
+            # --- 4. LOG THE ACTION ---
             await self.repository.log_action(
                 performed_by=patient_id,
                 action="BOOKING_CREATED",
@@ -46,22 +119,112 @@ class BookingService:
             )
             # -------------------------------
 
-            # 6. Commit Transaction (Release Lock)
+            # 5. Commit Transaction (Release Lock)
             await self.db.commit()
             await self.db.refresh(booking)
 
-            # 7. Save Result for Idempotency
-            response_data = {
-                "id": str(booking.id),
-                "status": booking.status,
-                "slot_id": str(booking.slot_id),
-                "patient_id": str(booking.patient_id),
-                "created_at": booking.created_at.isoformat() if booking.created_at else None
-            }
-            await self.repository.save_idempotency_response(idempotency_key, response_data)
-
             return booking
 
         except Exception as e:
             await self.db.rollback() 
-            raise e
\ No newline at end of file
+            raise e
+
+    async def book_slots(self, idempotency_key: str, patient_id: str, slot_ids: list):
+        """
+        Consecutive slots of one doctor as ONE booking, all or nothing.
+        Three round trips however many slots: lock (id order), write (one CTE), COMMIT.
+        """
+        holds = {}
+        try:
+            # 1. Admission: a hold on every slot, or none (same holds as single-slot booking)
+            if settings.SLOT_HOLDS_ENABLED:
+                holds = await self._acquire_holds(slot_ids)
+
+            # 2. Book (the database is still the source of truth)
+            booking = await self._book_multi(idempotency_key, patient_id, slot_ids)
+        except HTTPException as e:
+            BOOKING_ATTEMPTS.labels("multi", "conflict" if e.status_code == 409 else "rejected").inc()
+            await self._release_holds(holds)
+            raise
+        except Exception:
+            BOOKING_ATTEMPTS.labels("multi", "error").inc()
+            await self._release_holds(holds)
+            raise
+
+        # 3. Keep turning the crowd away from every booked slot for a few seconds
+        for slot_id, token in holds.items():
+            await slot_holds.mark_booked(slot_id, token)
+        BOOKING_ATTEMPTS.labels("multi", "booked").inc()
+        return booking
+
+    async def _acquire_holds(self, slot_ids: list) -> dict:
+        """{slot_id: token} for every slot, taken in id order; on any 409 drops what it took."""
+        acquired = {}
+        for slot_id in sorted(slot_ids, key=str):
+            try:
+                acquired[slot_id] = await self._acquire_hold(slot_id)
+            except HTTPException:
+                await self._release_holds(acquired)
+                raise
+        return acquired
+
+    @staticmethod
+    async def _release_holds(holds: dict):
+        for slot_id, token in holds.items():
+            await slot_holds.release(slot_id, token)
+
+    async def _book_multi(self, idempotency_key: str, patient_id: str, slot_ids: list):
+        try:
+            # 1. Lock every slot, in a deterministic order (no deadlocks)
+            slots = await self.repository.lock_slots(slot_ids)
+            if len(slots) != len(slot_ids):
+                raise HTTPException(status_code=404, detail="Slot not found")
+
+            # 2. Validate the whole set before touching anything
+            if any(slot.is_booked for slot in slots):
+                raise HTTPException(status_code=409, detail="Slot already booked")
+            if len({slot.doctor_id for slot in slots}) != 1:
+                raise HTTPException(status_code=400, detail="All slots must belong to the same doctor")
+            slots = sorted(slots, key=lambda slot: slot.start_time)
+            for previous, slot in zip(slots, slots[1:]):
+                if slot.start_time != previous.end_time:
+                    raise HTTPException(status_code=400, detail="Slots must be consecutive")
+
+            # 3. Book + Link + Audit (one statement)
+            ordered_ids = [slot.id for slot in slots]
+            booking = await self.repository.book_locked_slots(
+                patient_id, slots[0].doctor_id, ordered_ids,
+                details=f"Booked {len(ordered_ids)} slots from {ordered_ids[0]} via key {idempotency_key}"
+            )
+
+            # 4. Commit Transaction (Release Locks)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        return {
+            **booking._mapping,
+            "slot_ids": ordered_ids,
+            "start_time": slots[0].start_time,
+            "end_time": slots[-1].end_time,
+        }
+
+    async def list_bookings(self, current_user, status: BookingStatus = None, start: datetime = None,
+                            end: datetime = None, cursor: str = None, limit: int = 20):
+        # 1. Whose bookings?
+        if current_user.role == UserRole.PATIENT:
+            owner_column = Booking.patient_id
+        elif current_user.role == UserRole.DOCTOR:
+            owner_column = Booking.doctor_id
+        else:
+            raise HTTPException(status_code=403, detail="Only patients and doctors have bookings")
+
+        # 2. Resume after the last row of the previous page (naive bounds are UTC)
+        start, end = as_utc(start), as_utc(end)
+        position = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) if cursor else None
+
+        # 3. Fetch one page (+1 row to detect the next page)
+        rows = await self.repository.list_bookings(owner_column, current_user.id, status, start, end, position, limit)
+        page, next_cursor = keyset_page(rows, limit, key=lambda row: (row.created_at, row.id))
+        return {"data": page, "next_cursor": next_cursor}
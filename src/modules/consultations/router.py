@@ -1,46 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
 
 # Internal Imports
 from src.core.database import get_db
-from src.common.config import settings
-from src.modules.auth.repository import AuthRepository
 from src.modules.consultations.service import ConsultationService
+from src.modules.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/consultations", tags=["Consultations"])
 
-# --- 1. USE HTTP BEARER (Simple "Paste Token" Box) ---
-security = HTTPBearer()
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security), 
-    db: AsyncSession = Depends(get_db)
-):
-    token = credentials.credentials  # Extract token directly
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        # Decode the Token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    # Check if User Exists
-    repo = AuthRepository(db)
-    user = await repo.get_full_user_details(user_id) 
-    if user is None:
-        raise credentials_exception
-    
-    return user
+# --- 1. AUTH ---
+# Uses the shared get_current_user (cached principal, no per-request user lookup)
 
 # --- 2. THE SCHEMA ---
 class PrescriptionCreate(BaseModel):
@@ -2,19 +2,39 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from src.modules.auth.models import User, DoctorProfile, Profile, UserRole
 from src.common.cache import cache
+from src.common.codecs import PayloadCodec
+from src.common.config import settings
+from src.core.database import AsyncSessionLocal
+
+# Cache namespace for everything derived from doctor profiles.
+# Invalidate with: await cache.invalidate_namespace(DOCTORS_CACHE_NAMESPACE)
+DOCTORS_CACHE_NAMESPACE = "doctors"
+# Hot and read-mostly: worth serving from the in-process tier.
+# Search pages compress well, so large ones are stored compressed.
+cache.register_namespace(
+    DOCTORS_CACHE_NAMESPACE, local=True, codec=PayloadCodec("orjson", compression="zstd")
+)
 
 class DoctorService:
     def __init__(self, db_session):
         self.db = db_session
 
     async def search_doctors(self, query: str = None, specialization: str = None, page: int = 1, limit: int = 10):
-        # 1. CACHE CHECK (Fast Path)
-        cache_key = f"doctors:search:{query}:{specialization}:{page}:{limit}"
-        cached_result = await cache.get_cached_data(cache_key)
-        if cached_result:
-            return cached_result
+        # CACHE (Fast Path). On a miss only one query per key runs at a time;
+        # after the TTL stale results are served while one refresh runs.
+        cache_key = f"search:{query}:{specialization}:{page}:{limit}"
+
+        async def compute():
+            # Own session: the computation can outlive this request
+            async with AsyncSessionLocal() as db:
+                return await self._run_search(db, query, specialization, page, limit)
+
+        return await cache.get_or_set(
+            DOCTORS_CACHE_NAMESPACE, cache_key, compute, stale_ttl=settings.CACHE_STALE_TTL
+        )
 
-        # 2. BUILD QUERY
+    async def _run_search(self, db, query: str, specialization: str, page: int, limit: int):
+        # 1. BUILD QUERY
         stmt = (
             select(User)
             .join(DoctorProfile, User.id == DoctorProfile.user_id)
@@ -24,22 +44,22 @@ class DoctorService:
             .options(joinedload(User.doctor_profile), joinedload(User.profile))
         )
 
-        # 3. APPLY FILTERS
+        # 2. APPLY FILTERS
         if query:
             stmt = stmt.where(Profile.full_name.ilike(f"%{query}%"))
         
         if specialization:
             stmt = stmt.where(DoctorProfile.specialization.ilike(f"%{specialization}%"))
 
-        # 4. PAGINATION
+        # 3. PAGINATION
         offset = (page - 1) * limit
         stmt = stmt.offset(offset).limit(limit)
 
-        # 5. EXECUTE
-        result = await self.db.execute(stmt)
+        # 4. EXECUTE
+        result = await db.execute(stmt)
         doctors = result.unique().scalars().all()
 
-        # 6. FORMAT RESPONSE
+        # 5. FORMAT RESPONSE
         data = []
         for doc in doctors:
             name = doc.profile.full_name if doc.profile else "Unknown"
@@ -58,12 +78,8 @@ class DoctorService:
                 "consultation_fee": fee
             })
         
-        response = {
+        # Cached as JSON (safe because Fee is a float)
+        return {
             "data": data,
             "meta": {"page": page, "limit": limit, "count": len(data)}
-        }
-
-        # 7. SAVE TO CACHE (Now safe because Fee is a float)
-        await cache.set_cached_data(cache_key, response)
-
-        return response
\ No newline at end of file
+        }
\ No newline at end of file
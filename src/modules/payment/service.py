@@ -3,7 +3,8 @@ from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.modules.payment.models import Payment, PaymentStatus
 from src.modules.bookings.models import Booking, BookingStatus
-from src.modules.availability.models import AvailabilitySlot
+from src.modules.bookings.holds import slot_holds
+from src.modules.bookings.repository import BookingRepository
 from src.modules.auth.models import AuditLog
 
 class PaymentService:
@@ -36,8 +37,8 @@ class PaymentService:
         if signature != "valid_secret_key":
             raise ValueError("Invalid Webhook Signature")
 
-        # 2. Find Payment
-        query = select(Payment).where(Payment.transaction_id == transaction_id)
+        # 2. Find Payment (locked: a retried webhook waits for this one to finish)
+        query = select(Payment).where(Payment.transaction_id == transaction_id).with_for_update().execution_options(populate_existing=True)
         result = await self.db.execute(query)
         payment = result.scalars().first()
         
@@ -46,11 +47,27 @@ class PaymentService:
 
         # 3. Idempotency Check (If already processed, stop)
         if payment.status != PaymentStatus.PENDING:
+            await self.db.rollback()
             return "Already Processed"
 
-        # 4. Fetch Booking & Slot
-        booking = await self.db.get(Booking, payment.booking_id)
-        slot = await self.db.get(AvailabilitySlot, booking.slot_id)
+        # 4. Fetch + Lock Booking. The stale-booking janitor skips locked rows,
+        # and if it got there first we see its CANCELLED here.
+        query = select(Booking).where(Booking.id == payment.booking_id).with_for_update().execution_options(populate_existing=True)
+        booking = (await self.db.execute(query)).scalars().first()
+        released = []
+
+        if booking.status != BookingStatus.PENDING:
+            # Timed out first (slot already released): record the bank's answer only
+            if status in ("SUCCESS", "FAILED"):
+                payment.status = PaymentStatus(status)
+                self.db.add(AuditLog(
+                    action="PAYMENT_AFTER_TIMEOUT",
+                    target_id=str(booking.id),
+                    details=f"Payment {status} for a {booking.status.value} booking. Refund if captured.",
+                    performed_by=booking.patient_id
+                ))
+            await self.db.commit()
+            return {"status": "ignored", "new_state": booking.status}
 
         # 5. Handle Logic
         if status == "SUCCESS":
@@ -68,9 +85,8 @@ class PaymentService:
             payment.status = PaymentStatus.FAILED
             booking.status = BookingStatus.FAILED
             
-            # CRITICAL: RELEASE THE SLOT
-            slot.is_booked = False
-            slot.status = "OPEN"
+            # CRITICAL: RELEASE THE SLOT(S) (every slot of a multi-slot booking)
+            released = await BookingRepository(self.db).release_booking_slots(booking)
             
             # Audit
             self.db.add(AuditLog(
@@ -81,4 +97,8 @@ class PaymentService:
             ))
 
         await self.db.commit()
+
+        # Reopened slot: drop any 'booked' hold marker so it is bookable right away
+        if released:
+            await slot_holds.clear(*released)
         return {"status": "updated", "new_state": booking.status}
\ No newline at end of file
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import json
+import sys
+import os
+
+# Setup Path
+sys.path.append(os.getcwd())
+
+from src.modules.auth.bulk_import import BulkImportService, HashPool, parse_rows
+
+async def bulk_import(path: str, fmt: str, batch_size: int, workers: int):
+    with open(path, "rb") as f:
+        content = f.read()
+
+    print(f"\n📥 --- Bulk Import: {path} ({fmt}) ---", file=sys.stderr)
+    pool = HashPool(workers)
+    pool.start()
+    try:
+        service = BulkImportService(batch_size=batch_size, pool=pool)
+        async for result in service.import_rows(parse_rows(content, fmt)):
+            if result.get("summary"):
+                print(f"\n✅ Created: {result['created']}  ❌ Failed: {result['failed']}", file=sys.stderr)
+            else:
+                # Per-row results on stdout (NDJSON), e.g. `> results.ndjson`
+                print(json.dumps(result))
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk-create users / doctors. CSV needs a header row: "
+                    "email,password,full_name,phone_number,role,specialization,experience_years,consultation_fee"
+    )
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="bcrypt processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(bulk_import(args.path, fmt, args.batch_size, args.workers))
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+import fakeredis
+from src.common.cache import CacheService
+
+# Unit tests: read-through cache on in-memory Redis (fakeredis runs the Lua scripts), no services needed
+
+NAMESPACE = "doctors"
+
+def make_cache(server) -> CacheService:
+    """A CacheService (one worker) whose clients point at a shared in-memory server."""
+    service = CacheService()
+    service.redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    service.binary = fakeredis.FakeAsyncRedis(server=server)
+    service._get_script = service.binary.register_script(service._get_script.script)
+    service._set_script = service.binary.register_script(service._set_script.script)
+    service._delete_script = service.binary.register_script(service._delete_script.script)
+    return service
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def cache(server):
+    return make_cache(server)
+
+class Compute:
+    """compute() stand-in that blocks until released and counts its calls."""
+    def __init__(self, value="fresh"):
+        self.value = value
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        return self.value
+
+@pytest.mark.anyio
+async def test_concurrent_misses_compute_once(cache):
+    compute = Compute()
+    callers = [asyncio.create_task(cache.get_or_set(NAMESPACE, "k", compute)) for _ in range(10)]
+    await compute.started.wait()
+    compute.release.set()
+
+    assert await asyncio.gather(*callers) == ["fresh"] * 10
+    assert compute.calls == 1
+    # Stored for the next caller
+    assert await cache.get_or_set(NAMESPACE, "k", compute) == "fresh"
+    assert compute.calls == 1
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_the_shared_computation(cache):
+    compute = Compute()
+    impatient = asyncio.create_task(cache.get_or_set(NAMESPACE, "k", compute))
+    patient = asyncio.create_task(cache.get_or_set(NAMESPACE, "k", compute))
+    await compute.started.wait()
+
+    impatient.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await impatient
+    compute.release.set()
+
+    assert await patient == "fresh"
+    assert compute.calls == 1
+
+@pytest.mark.anyio
+async def test_invalidation_during_compute_drops_the_write(cache):
+    async def compute():
+        # e.g. a doctor updated their profile while we were reading the old one
+        await cache.invalidate_namespace(NAMESPACE)
+        return "computed before the invalidation"
+
+    assert await cache.get_or_set(NAMESPACE, "k", compute) == "computed before the invalidation"
+    assert await cache.get_cached_data(NAMESPACE, "k") is None
+
+@pytest.mark.anyio
+async def test_soft_expired_entry_is_served_stale_with_one_refresh(server, cache):
+    await cache.set_cached_data(NAMESPACE, "k", {"value": "stale", "fresh_until": time.time() - 1}, ttl=60)
+    compute = Compute()
+
+    # Served stale right away, while exactly one refresh runs in the background
+    assert await cache.get_or_set(NAMESPACE, "k", compute, ttl=30, stale_ttl=30) == "stale"
+    assert await cache.get_or_set(NAMESPACE, "k", compute, ttl=30, stale_ttl=30) == "stale"
+    await compute.started.wait()
+    assert await cache.redis.exists(f"cache:refresh:{NAMESPACE}:k")
+
+    # Another worker sees the same stale entry: the Redis lock keeps it from refreshing too
+    other_worker, other_compute = make_cache(server), Compute()
+    assert await other_worker.get_or_set(NAMESPACE, "k", other_compute, ttl=30, stale_ttl=30) == "stale"
+    await asyncio.gather(*other_worker._refreshing.values())
+    assert other_compute.calls == 0
+
+    compute.release.set()
+    await asyncio.gather(*cache._refreshing.values())
+    assert compute.calls == 1
+    assert not await cache.redis.exists(f"cache:refresh:{NAMESPACE}:k")
+    assert await cache.get_or_set(NAMESPACE, "k", compute, ttl=30, stale_ttl=30) == "fresh"
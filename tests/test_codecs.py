@@ -0,0 +1,31 @@
+import json
+import pytest
+from src.common.codecs import PayloadCodec, SERIALIZER_TAGS, COMPRESSOR_TAGS
+
+# Unit tests: cache payload framing, no services needed
+
+PAYLOAD = {"data": [{"id": str(i), "name": "Dr. Test", "fee": 500.0, "tags": ["a", "b"]} for i in range(50)], "total": 50}
+
+@pytest.mark.parametrize("serializer", sorted(SERIALIZER_TAGS))
+@pytest.mark.parametrize("compression", sorted(COMPRESSOR_TAGS, key=str))
+def test_every_codec_round_trips(serializer, compression):
+    codec = PayloadCodec(serializer, compression, compress_min_bytes=0)
+    encoded = codec.encode(PAYLOAD)
+    assert encoded[:1] == SERIALIZER_TAGS[serializer]
+    assert encoded[1:2] == COMPRESSOR_TAGS[compression]
+    # decode needs no codec: the frame says how it was written
+    assert PayloadCodec.decode(encoded) == PAYLOAD
+
+def test_small_payloads_are_not_compressed():
+    codec = PayloadCodec("json", "zlib", compress_min_bytes=1024)
+    assert codec.encode({"a": 1})[1:2] == COMPRESSOR_TAGS[None]
+    assert codec.encode(PAYLOAD)[1:2] == COMPRESSOR_TAGS["zlib"]
+
+def test_legacy_plain_json_still_decodes():
+    assert PayloadCodec.decode(json.dumps(PAYLOAD).encode()) == PAYLOAD
+
+def test_unknown_codecs_fall_back():
+    codec = PayloadCodec("nope", "nope")
+    assert codec.serializer in ("orjson", "json")
+    assert codec.compression == "zlib"
+    assert PayloadCodec.decode(codec.encode(PAYLOAD)) == PAYLOAD
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from src.core.db_instrumentation import QueryStats, install_query_hooks, query_stats_var
+
+# Unit tests: engine timing hooks on in-memory SQLite, no services needed
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    install_query_hooks(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def stats():
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    yield stats
+    query_stats_var.reset(token)
+
+def test_statements_are_counted(engine, stats):
+    with engine.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.repeated_statements(3) == [("SELECT 1", 3)]
+
+def test_failed_statement_is_counted_and_leaves_no_start_time(engine, stats):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.connection.info.get("query_start_time") == []
+        conn.execute(text("SELECT 1"))
+    assert stats.count == 2
+    assert stats.shapes["SELECT * FROM missing_table"] == 1
@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+import fakeredis
+from src.common.config import settings
+from src.common.idempotency import IdempotencyMiddleware, RedisIdempotencyStore
+
+# Unit tests: the ASGI middleware driven directly, records in fakeredis, no services needed
+
+class App:
+    """Inner ASGI app: counts calls and answers with the given status and body chunks."""
+    def __init__(self, chunks=(b'{"id": ', b'1}'), status=201, media_type=b"application/json"):
+        self.chunks = list(chunks)
+        self.status = status
+        self.media_type = media_type
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await send({"type": "http.response.start", "status": self.status,
+                    "headers": [(b"content-type", self.media_type)]})
+        for i, chunk in enumerate(self.chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(self.chunks) - 1})
+
+class SlowApp(App):
+    """Stays in flight until released."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.started.set()
+        await self.release.wait()
+        await super().__call__(scope, receive, send)
+
+async def call(middleware, key="k", path="/bookings/"):
+    """One POST through the middleware. Returns (status, headers, body)."""
+    scope = {
+        "type": "http", "method": "POST", "path": path, "query_string": b"",
+        "headers": [(b"idempotency-key", key.encode())],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    start = messages[0]
+    headers = {k.decode().lower(): v.decode() for k, v in start.get("headers", [])}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], headers, body
+
+@pytest.fixture
+def store():
+    return RedisIdempotencyStore(fakeredis.FakeAsyncRedis())
+
+@pytest.mark.anyio
+async def test_chunked_response_is_replayed_byte_for_byte(store):
+    app = App(chunks=[b'{"id": ', b'"abc", ', b'"ok": true}'])
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    first = await call(middleware)
+    replay = await call(middleware)
+    assert first[0] == replay[0] == 201
+    assert replay[2] == first[2] == b'{"id": "abc", "ok": true}'
+    assert replay[1]["x-idempotency-hit"] == "true"
+    assert app.calls == 1
+
+@pytest.mark.anyio
+async def test_oversized_response_is_streamed_but_not_stored(store):
+    app = App(chunks=[b"x" * 60, b"y" * 60])
+    middleware = IdempotencyMiddleware(app, max_body_bytes=100, store=store)
+
+    status, _, body = await call(middleware)
+    assert status == 201 and body == b"x" * 60 + b"y" * 60
+    await call(middleware)
+    assert app.calls == 2 # Nothing stored: the retry executes again
+
+@pytest.mark.anyio
+async def test_binary_body_is_not_stored(store):
+    app = App(chunks=[b"\xff\xfe\x00"], media_type=b"application/octet-stream")
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    assert (await call(middleware))[2] == b"\xff\xfe\x00"
+    await call(middleware)
+    assert app.calls == 2
+
+@pytest.mark.anyio
+async def test_server_error_releases_the_claim(store):
+    app = App(status=500)
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    assert (await call(middleware))[0] == 500
+    app.status = 201
+    status, headers, _ = await call(middleware)
+    assert status == 201 and "x-idempotency-hit" not in headers
+    assert app.calls == 2
+
+@pytest.mark.anyio
+async def test_concurrent_duplicate_waits_and_replays(store):
+    app = SlowApp()
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    first = asyncio.create_task(call(middleware))
+    await app.started.wait()
+    duplicate = asyncio.create_task(call(middleware))
+    await asyncio.sleep(0.1) # The duplicate is polling, not executing
+    app.release.set()
+
+    assert (await first)[0] == 201
+    status, headers, body = await duplicate
+    assert status == 201 and body == b'{"id": 1}'
+    assert headers["x-idempotency-hit"] == "true"
+    assert app.calls == 1
+
+@pytest.mark.anyio
+async def test_duplicate_gets_409_after_the_wait(store, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    app = SlowApp()
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    first = asyncio.create_task(call(middleware))
+    await app.started.wait()
+    status, headers, _ = await call(middleware)
+    assert status == 409 and headers["retry-after"] == "1"
+
+    app.release.set()
+    assert (await first)[0] == 201
+    assert app.calls == 1
+
+@pytest.mark.anyio
+async def test_same_key_on_different_paths_does_not_collide(store):
+    app = App()
+    middleware = IdempotencyMiddleware(app, store=store)
+
+    await call(middleware, key="k", path="/bookings/")
+    status, headers, _ = await call(middleware, key="k", path="/payments/intent")
+    assert status == 201 and "x-idempotency-hit" not in headers
+    assert app.calls == 2
@@ -0,0 +1,37 @@
+import pytest
+import fakeredis
+from src.common.idempotency import RedisIdempotencyStore
+
+# Unit tests: in-memory Redis (fakeredis runs the Lua scripts), no services needed
+
+RECORD = {"status_code": 201, "media_type": "application/json", "body": '{"id": 1}'}
+
+@pytest.fixture
+def store():
+    return RedisIdempotencyStore(fakeredis.FakeAsyncRedis())
+
+@pytest.mark.anyio
+async def test_first_claim_wins_duplicates_wait(store):
+    assert await store.claim("k", "a") == ("claimed", None)
+    assert await store.claim("k", "b") == ("in_progress", None)
+
+@pytest.mark.anyio
+async def test_completed_key_is_replayed_not_claimed(store):
+    # The predecessor finished before we got here: we must replay, never re-execute
+    await store.claim("k", "a")
+    await store.complete("k", "a", RECORD)
+    state, record = await store.claim("k", "b")
+    assert state == "stored"
+    assert record["status_code"] == 201
+
+@pytest.mark.anyio
+async def test_release_lets_a_retry_execute(store):
+    await store.claim("k", "a")
+    await store.release("k", "a")
+    assert await store.claim("k", "b") == ("claimed", None)
+
+@pytest.mark.anyio
+async def test_release_by_a_stale_owner_keeps_the_new_lease(store):
+    await store.claim("k", "a")
+    await store.release("k", "someone-else")
+    assert await store.claim("k", "b") == ("in_progress", None)
@@ -0,0 +1,47 @@
+import time
+import uuid
+import pytest
+from fastapi import HTTPException
+from src.common.jwt_cache import VerifiedTokenCache, verified_tokens
+from src.common.utils import create_access_token, create_refresh_token
+from src.modules.auth.dependencies import decode_access_token
+
+# Unit tests: per-worker verified-token LRU, no services needed
+
+def claims(ttl=60):
+    return {"sub": str(uuid.uuid4()), "exp": time.time() + ttl}
+
+def test_hit_until_the_token_expires():
+    cache = VerifiedTokenCache(max_items=10)
+    live, expired = claims(), claims(ttl=-1)
+    cache.set("live", live)
+    cache.set("expired", expired)
+    assert cache.get("live") is live
+    assert cache.get("expired") is None
+    assert cache.get("unknown") is None
+
+def test_least_recently_used_is_evicted():
+    cache = VerifiedTokenCache(max_items=2)
+    cache.set("a", claims())
+    cache.set("b", claims())
+    cache.get("a") # 'b' is now the oldest
+    cache.set("c", claims())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+def test_disabled_or_without_exp_is_never_cached():
+    cache = VerifiedTokenCache(max_items=0)
+    cache.set("a", claims())
+    assert cache.get("a") is None
+
+    cache = VerifiedTokenCache(max_items=10)
+    cache.set("a", {"sub": "x"})
+    assert cache.get("a") is None
+
+def test_refresh_token_is_never_a_bearer_token():
+    verified_tokens.clear()
+    user_id = str(uuid.uuid4())
+    assert decode_access_token(create_access_token({"sub": user_id}))["sub"] == user_id
+    with pytest.raises(HTTPException) as e:
+        decode_access_token(create_refresh_token({"sub": user_id, "fam": str(uuid.uuid4())}))
+    assert e.value.status_code == 401
@@ -0,0 +1,72 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException
+from src.common.pagination import encode_cursor, decode_cursor, keyset_page, as_utc
+from src.modules.auth.models import UserRole
+from src.modules.availability.service import AvailabilityService
+from src.modules.bookings.service import BookingService
+
+# Unit tests: pure keyset-pagination helpers, no services needed
+
+Row = namedtuple("Row", ["start_time", "id"])
+
+def rows(count):
+    return [Row(datetime(2030, 1, 1, 9, i, tzinfo=timezone.utc), uuid.uuid4()) for i in range(count)]
+
+def test_cursor_round_trip():
+    start, slot_id = datetime(2030, 1, 1, 9, 30, tzinfo=timezone.utc), uuid.uuid4()
+    cursor = encode_cursor(start, slot_id)
+    assert "=" not in cursor # URL-safe, unpadded
+    assert decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) == (start, slot_id)
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor("x"), encode_cursor("not a date", str(uuid.uuid4()))])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+    assert e.value.status_code == 400
+
+def test_keyset_page_has_next_cursor_only_with_extra_row():
+    fetched = rows(4) # LIMIT limit + 1
+    page, cursor = keyset_page(fetched, 3, key=lambda row: (row.start_time, row.id))
+    assert page == fetched[:3]
+    assert decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) == (fetched[2].start_time, fetched[2].id)
+
+    page, cursor = keyset_page(fetched[:3], 3, key=lambda row: (row.start_time, row.id))
+    assert page == fetched[:3] and cursor is None
+
+def test_naive_bounds_are_utc():
+    assert as_utc(datetime(2030, 1, 1, 9)) == datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+    aware = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+    assert as_utc(aware) is aware
+    assert as_utc(None) is None
+
+@pytest.mark.anyio
+async def test_doctor_slot_window_reads_naive_bounds_as_utc():
+    class Repository:
+        async def get_doctor_slots(self, doctor_id, start, end, cursor, limit):
+            self.window = (start, end)
+            return []
+
+    repository = Repository()
+    await AvailabilityService(repository).list_slots("doctor", datetime(2026, 3, 1, 9), datetime(2026, 3, 2, 9))
+    assert repository.window == (
+        datetime(2026, 3, 1, 9, tzinfo=timezone.utc),
+        datetime(2026, 3, 2, 9, tzinfo=timezone.utc),
+    )
+
+@pytest.mark.anyio
+async def test_booking_history_window_reads_naive_bounds_as_utc():
+    class Repository:
+        db = None
+        async def list_bookings(self, owner_column, owner_id, status, start, end, cursor, limit):
+            self.window = (start, end)
+            return []
+
+    class Patient:
+        id, role = uuid.uuid4(), UserRole.PATIENT
+
+    repository = Repository()
+    await BookingService(repository).list_bookings(Patient(), start=datetime(2026, 3, 1), end=datetime(2026, 4, 1))
+    assert repository.window == (datetime(2026, 3, 1, tzinfo=timezone.utc), datetime(2026, 4, 1, tzinfo=timezone.utc))
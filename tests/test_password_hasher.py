@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from src.common import password_hasher as module
+from src.common.password_hasher import PasswordHasher
+
+# Unit tests: bcrypt pool backpressure, no services needed
+
+def pending() -> float:
+    return REGISTRY.get_sample_value("password_hash_pending")
+
+@pytest.mark.anyio
+async def test_saturated_pool_fails_fast_with_503(monkeypatch):
+    unblock = threading.Event()
+
+    def blocked_hash(password):
+        unblock.wait(5)
+        return "hashed"
+
+    monkeypatch.setattr(module, "get_password_hash", blocked_hash)
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        in_flight = asyncio.create_task(hasher.hash("a"))
+        while pending() != 1:
+            await asyncio.sleep(0.01)
+
+        # Both kinds of call are turned away at once instead of queueing
+        for call in (hasher.hash("b"), hasher.verify("b", "hashed")):
+            with pytest.raises(HTTPException) as e:
+                await call
+            assert e.value.status_code == 503
+            assert e.value.headers["Retry-After"] == "1"
+
+        unblock.set()
+        assert await in_flight == "hashed"
+        assert pending() == 0
+    finally:
+        unblock.set()
+        hasher.shutdown()
+
+@pytest.mark.anyio
+async def test_real_hash_and_verify_round_trip():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    try:
+        hashed = await hasher.hash("password123")
+        assert await hasher.verify("password123", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert pending() == 0
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,47 @@
+import os
+import pytest
+from src.common.config import settings
+from src.core.profiling import ProfilingMiddleware
+
+# Unit tests: the profiling middleware driven directly, no services needed
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+async def call(middleware):
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"x-profile-token", b"secret")]}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await middleware(scope, receive, send)
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    return tmp_path
+
+@pytest.mark.anyio
+async def test_only_the_newest_profiles_are_kept(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_MAX_FILES", 2)
+    middleware = ProfilingMiddleware(app)
+    old = profiling / "old.pstats"
+    old.write_bytes(b"")
+    os.utime(old, (0, 0))
+
+    for _ in range(3):
+        await call(middleware)
+    files = os.listdir(profiling)
+    assert len(files) == 2 and "old.pstats" not in files
+
+def test_sampling_without_a_cap_is_refused(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.1)
+    monkeypatch.setattr(settings, "PROFILING_MAX_FILES", 0)
+    with pytest.raises(ValueError):
+        ProfilingMiddleware(app)
@@ -0,0 +1,50 @@
+from datetime import date, time, timedelta, datetime, timezone
+from src.modules.availability.schemas import RecurringSlotTemplate
+from src.modules.availability.service import expand_template
+
+# Unit tests: pure template expansion, no services needed
+
+def template(**overrides):
+    fields = dict(weekdays=[6], day_start=time(1, 0), day_end=time(4, 0), slot_minutes=30,
+                  start_date=date(2026, 3, 8), weeks=1, timezone="America/New_York")
+    fields.update(overrides)
+    return RecurringSlotTemplate(**fields)
+
+def assert_well_formed(intervals, minutes):
+    for start, end in intervals:
+        assert end - start == timedelta(minutes=minutes)
+    for (_, previous_end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= previous_end # sorted, no overlaps
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def test_wall_clock_time_is_kept_across_dst():
+    # 09:00 New York is 14:00 UTC in winter, 13:00 UTC in summer
+    intervals = expand_template(template(weekdays=[4], day_start=time(9, 0), day_end=time(10, 0),
+                                         slot_minutes=60, start_date=date(2026, 3, 2), weeks=2))
+    assert intervals == [
+        (utc(2026, 3, 6, 14), utc(2026, 3, 6, 15)),
+        (utc(2026, 3, 13, 13), utc(2026, 3, 13, 14)),
+    ]
+
+def test_spring_forward_skips_the_missing_hour():
+    # 02:00-03:00 doesn't exist on 2026-03-08 in New York
+    intervals = expand_template(template())
+    assert_well_formed(intervals, 30)
+    assert [start for start, _ in intervals] == [
+        utc(2026, 3, 8, 6), utc(2026, 3, 8, 6, 30),  # 01:00, 01:30 EST
+        utc(2026, 3, 8, 7), utc(2026, 3, 8, 7, 30),  # 03:00, 03:30 EDT
+    ]
+
+def test_fall_back_never_stretches_a_slot():
+    # 01:00-02:00 happens twice on 2026-11-01: the slot crossing it would last 90 minutes
+    intervals = expand_template(template(day_start=time(0, 30), day_end=time(3, 0), start_date=date(2026, 11, 1)))
+    assert_well_formed(intervals, 30)
+    assert (utc(2026, 11, 1, 5, 30), utc(2026, 11, 1, 7)) not in intervals
+    assert intervals[-1] == (utc(2026, 11, 1, 7, 30), utc(2026, 11, 1, 8))
+
+def test_only_selected_weekdays():
+    intervals = expand_template(template(weekdays=[0, 2], day_start=time(9, 0), day_end=time(9, 30),
+                                         start_date=date(2026, 6, 1), weeks=2, timezone="UTC"))
+    assert [start.weekday() for start, _ in intervals] == [0, 2, 0, 2]
@@ -0,0 +1,49 @@
+import pytest
+import fakeredis
+from src.common.config import settings
+from src.modules.bookings.holds import SlotHolds, NO_HOLD, BOOKED
+
+# Unit tests: in-memory Redis (fakeredis runs the Lua scripts), no services needed
+
+@pytest.fixture
+def holds():
+    return SlotHolds(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+@pytest.mark.anyio
+async def test_one_winner_per_slot(holds):
+    token, holder = await holds.acquire("s1")
+    assert token and holder is None
+    token2, remaining_ms = await holds.acquire("s1")
+    assert token2 is None
+    assert 0 < remaining_ms <= settings.SLOT_HOLD_TTL_MS
+    # Other slots are independent
+    assert (await holds.acquire("s2"))[0]
+
+@pytest.mark.anyio
+async def test_booked_marker_turns_the_crowd_away(holds):
+    token, _ = await holds.acquire("s1")
+    await holds.mark_booked("s1", token)
+    assert await holds.acquire("s1") == (None, BOOKED)
+
+@pytest.mark.anyio
+async def test_only_the_owner_releases_or_converts(holds):
+    token, _ = await holds.acquire("s1")
+    await holds.release("s1", "someone-else")
+    await holds.mark_booked("s1", "someone-else")
+    assert await holds.redis.get("slot_hold:s1") == token
+
+    await holds.release("s1", token)
+    assert (await holds.acquire("s1"))[0]
+
+@pytest.mark.anyio
+async def test_clear_reopens_booked_slots(holds):
+    for slot_id in ("s1", "s2"):
+        token, _ = await holds.acquire(slot_id)
+        await holds.mark_booked(slot_id, token)
+    await holds.clear("s1", "s2")
+    assert (await holds.acquire("s1"))[0] and (await holds.acquire("s2"))[0]
+
+@pytest.mark.anyio
+async def test_redis_down_fails_open():
+    holds = SlotHolds(fakeredis.FakeAsyncRedis(decode_responses=True, connected=False))
+    assert await holds.acquire("s1") == (NO_HOLD, None)